@@ -0,0 +1,88 @@
+"""
+Request coalescing for chatbot message analysis
+"""
+
+import asyncio
+from typing import List, Tuple, Optional, Set, Dict, Any
+
+from app.chatbot.intent_classifier import IntentClassifier, intent_classifier
+
+class IntentBatcher:
+    """
+    Coalesce concurrent classification requests into a single nlp.pipe() call.
+    Messages arriving within `window` seconds are dispatched together; a full
+    batch is dispatched immediately. Batches run on a worker thread, one at a
+    time, so the event loop keeps serving requests while spaCy works.
+    """
+
+    __slots__ = (
+        "classifier", "window", "max_batch_size",
+        "_pending", "_flush_handle", "_batch_lock", "_tasks"
+    )
+
+    def __init__(
+        self,
+        classifier: IntentClassifier,
+        window: float = 0.01,
+        max_batch_size: int = 64
+    ):
+        self.classifier = classifier
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Created on first use so it binds to the server's event loop
+        self._batch_lock: Optional[asyncio.Lock] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def classify(self, message: str) -> Tuple[str, float, List[str], Dict[str, Any]]:
+        """Queue a message and wait for its (intent, confidence, entities, extracted entities)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        
+        return await future
+
+    def _flush(self):
+        """Hand everything queued so far to a background classification task"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        
+        task = asyncio.get_running_loop().create_task(self._run_batch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, pending: List[Tuple[str, asyncio.Future]]):
+        """Classify a batch off the event loop and resolve the waiting futures"""
+        if self._batch_lock is None:
+            self._batch_lock = asyncio.Lock()
+        
+        try:
+            async with self._batch_lock:
+                results = await asyncio.to_thread(
+                    self.classifier.analyze_batch,
+                    [message for message, _ in pending],
+                    self.max_batch_size
+                )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+# Global instance
+intent_batcher = IntentBatcher(intent_classifier)
@@ -5,17 +5,44 @@ Chatbot Intent Classification using spaCy
 import spacy
 import json
 import os
+import random
+import numpy as np
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple
 import re
+import threading
+
+from app.utils.cache import LRUCache
+from app.utils.text_matching import build_automaton
+
+# Only NER (doc.ents) is used; the rest of the default pipeline is dead weight
+DISABLED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+# Entries kept for per-message classification and spaCy entity results
+CLASSIFICATION_CACHE_SIZE = 2048
+
+# Monetary amounts such as "$1,250.00" or "45"
+MONEY_RE = re.compile(r'\$?(\d+(?:,\d{3})*(?:\.\d{2})?)')
+
+# spaCy entity labels reported as dates
+DATE_LABELS = frozenset({"DATE", "TIME"})
+
+# Reply when an intent has no response templates
+FALLBACK_RESPONSE = "I'm not sure how to help with that. Can you please rephrase your question?"
+
+# Category keywords recognised by extract_entities
+CATEGORY_KEYWORDS = [
+    "food", "dining", "restaurant", "grocery", "shopping", "gas", "transportation",
+    "entertainment", "bills", "utilities", "healthcare", "insurance", "rent",
+    "mortgage", "salary", "income", "investment", "savings"
+]
 
 class IntentClassifier:
     def __init__(self):
-        # Load spaCy model
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("spaCy model not found. Please install: python -m spacy download en_core_web_sm")
-            self.nlp = None
+        # spaCy model is loaded on first use (see the nlp property)
+        self._nlp = None
+        self._nlp_loaded = False
+        self._nlp_lock = threading.Lock()
         
         # Define intents and their patterns
         self.intents = {
@@ -142,6 +169,67 @@ class IntentClassifier:
                 ]
             }
         }
+        
+        # Encode every pattern as a row of a pattern x vocabulary word-incidence
+        # matrix so Jaccard scores for all patterns come from one matvec
+        self._intent_names = list(self.intents)
+        self._templates = {intent: tuple(data["responses"]) for intent, data in self.intents.items()}
+        pattern_words = [
+            frozenset(pattern.split())
+            for data in self.intents.values()
+            for pattern in data["patterns"]
+        ]
+        self._vocabulary = {
+            word: index
+            for index, word in enumerate(sorted(set().union(*pattern_words)))
+        }
+        self._pattern_matrix = np.zeros((len(pattern_words), len(self._vocabulary)), dtype=np.int32)
+        for row, words in enumerate(pattern_words):
+            self._pattern_matrix[row, [self._vocabulary[word] for word in words]] = 1
+        self._pattern_sizes = self._pattern_matrix.sum(axis=1)
+        
+        # Row offset of each intent's first pattern, for per-intent max reduction
+        self._intent_offsets = np.cumsum(
+            [0] + [len(data["patterns"]) for data in self.intents.values()][:-1]
+        )
+        
+        # Single-pass substring matching over all intent patterns
+        # (a pattern may belong to more than one intent, e.g. "savings goal")
+        # Payloads are intent indices, so a hit updates its score directly
+        pattern_intents: Dict[str, List[int]] = {}
+        for index, data in enumerate(self.intents.values()):
+            for pattern in data["patterns"]:
+                pattern_intents.setdefault(pattern, []).append(index)
+        
+        self._pattern_automaton = build_automaton(
+            (pattern, tuple(indices)) for pattern, indices in pattern_intents.items()
+        )
+        
+        # Single-pass matching over category keywords
+        self._category_automaton = build_automaton(
+            (category, index) for index, category in enumerate(CATEGORY_KEYWORDS)
+        )
+        
+        # Intent scoring depends only on the normalized text; spaCy entities
+        # depend on the original casing, so they are cached on the raw message
+        self._score_message = lru_cache(maxsize=CLASSIFICATION_CACHE_SIZE)(self._score_message)
+        self._entity_cache = LRUCache(maxsize=CLASSIFICATION_CACHE_SIZE)
+        self._extracted_cache = LRUCache(maxsize=CLASSIFICATION_CACHE_SIZE)
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access so importing this module stays cheap"""
+        if not self._nlp_loaded:
+            with self._nlp_lock:
+                if not self._nlp_loaded:
+                    try:
+                        self._nlp = spacy.load("en_core_web_sm", disable=DISABLED_PIPES)
+                    except OSError:
+                        print("spaCy model not found. Please install: python -m spacy download en_core_web_sm")
+                        self._nlp = None
+                    self._nlp_loaded = True
+        
+        return self._nlp
 
     def classify_intent(self, message: str) -> Tuple[str, float, List[str]]:
         """
@@ -151,103 +239,155 @@ class IntentClassifier:
         if not self.nlp:
             return "unknown", 0.0, []
         
-        message_lower = message.lower()
+        intent, score = self._score_message(message.lower().strip())
+        return intent, score, self._entity_dicts(self._get_entities(message))
+
+    def warmup(self):
+        """Load spaCy and run sample messages through it so the first chat request doesn't pay for it"""
+        if not self.nlp:
+            return
         
-        # Extract entities using spaCy
-        doc = self.nlp(message)
-        entities = []
+        list(self.nlp.pipe(["hi", "what's my balance"]))
+        self.classify_intent("hi")
+
+    def classify_intents_batch(
+        self,
+        messages: List[str],
+        batch_size: int = 64
+    ) -> List[Tuple[str, float, List[str]]]:
+        """
+        Classify a batch of messages, running only uncached ones through
+        a single nlp.pipe() pass
+        Returns one (intent, confidence, entities) tuple per message
+        """
+        if not self.nlp:
+            return [("unknown", 0.0, []) for _ in messages]
+        
+        entities = {message: self._entity_cache.get(message) for message in messages}
+        uncached = [message for message, ents in entities.items() if ents is None]
+        
+        for message, doc in zip(uncached, self.nlp.pipe(uncached, batch_size=batch_size)):
+            entities[message] = self._doc_entities(doc)
+            self._entity_cache.set(message, entities[message])
+        
+        results = []
+        for message in messages:
+            intent, score = self._score_message(message.lower().strip())
+            results.append((intent, score, self._entity_dicts(entities[message])))
+        
+        return results
+
+    def analyze_batch(
+        self,
+        messages: List[str],
+        batch_size: int = 64
+    ) -> List[Tuple[str, float, List[str], Dict[str, Any]]]:
+        """
+        classify_intents_batch plus extract_entities for each message
+        The batch pass caches every doc's entities, so extraction adds no spaCy calls
+        """
+        classified = self.classify_intents_batch(messages, batch_size)
+        
+        return [
+            (intent, score, entities, self.extract_entities(message))
+            for (intent, score, entities), message in zip(classified, messages)
+        ]
+
+    def _get_entities(self, message: str) -> Tuple[Tuple[str, str, int, int], ...]:
+        """spaCy entities of a message as (text, label, start, end), cached"""
+        ents = self._entity_cache.get(message)
         
-        for ent in doc.ents:
-            entities.append({
-                "text": ent.text,
-                "label": ent.label_,
-                "start": ent.start_char,
-                "end": ent.end_char
-            })
+        if ents is None:
+            ents = self._doc_entities(self.nlp(message))
+            self._entity_cache.set(message, ents)
         
+        return ents
+
+    @staticmethod
+    def _doc_entities(doc) -> Tuple[Tuple[str, str, int, int], ...]:
+        """Immutable snapshot of a doc's entities, safe to share from the cache"""
+        return tuple((ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents)
+
+    @staticmethod
+    def _entity_dicts(ents: Tuple[Tuple[str, str, int, int], ...]) -> List[Dict[str, Any]]:
+        """Fresh entity dicts for the API response"""
+        return [
+            {"text": text, "label": label, "start": start, "end": end}
+            for text, label, start, end in ents
+        ]
+
+    def _score_message(self, message_lower: str) -> Tuple[str, float]:
+        """Pick the best intent for a lowercased message"""
         # Simple pattern matching for intent classification
-        best_intent = "unknown"
-        best_score = 0.0
+        scores = self._calculate_intent_scores(frozenset(message_lower.split()))
+        
+        # Boost score if a pattern is a substring of message
+        for _, indices in self._pattern_automaton.iter(message_lower):
+            for index in indices:
+                scores[index] = max(scores[index], 0.8)
         
-        for intent, data in self.intents.items():
-            score = self._calculate_intent_score(message_lower, data["patterns"])
-            if score > best_score:
-                best_score = score
-                best_intent = intent
+        best_index = int(scores.argmax())
+        best_intent = self._intent_names[best_index]
+        best_score = float(scores[best_index])
         
         # If no good match found, classify as unknown
         if best_score < 0.3:
             best_intent = "unknown"
             best_score = 0.0
         
-        return best_intent, best_score, entities
+        return best_intent, best_score
 
-    def _calculate_intent_score(self, message: str, patterns: List[str]) -> float:
-        """Calculate similarity score between message and intent patterns"""
-        message_words = set(message.split())
+    def _calculate_intent_scores(self, message_words) -> np.ndarray:
+        """Best Jaccard similarity between the message and each intent's patterns"""
+        message_vector = np.zeros(len(self._vocabulary), dtype=np.int32)
+        known = [self._vocabulary[word] for word in message_words if word in self._vocabulary]
+        message_vector[known] = 1
         
-        max_score = 0.0
+        # |A ∪ B| = |A| + |B| - |A ∩ B|; patterns are never empty so union > 0
+        intersection = self._pattern_matrix @ message_vector
+        union = self._pattern_sizes + len(message_words) - intersection
         
-        for pattern in patterns:
-            pattern_words = set(pattern.split())
-            
-            # Calculate Jaccard similarity
-            intersection = message_words.intersection(pattern_words)
-            union = message_words.union(pattern_words)
-            
-            if union:
-                score = len(intersection) / len(union)
-                max_score = max(max_score, score)
-            
-            # Boost score if pattern is a substring of message
-            if pattern in message:
-                max_score = max(max_score, 0.8)
-        
-        return max_score
+        return np.maximum.reduceat(intersection / union, self._intent_offsets)
 
     def get_response_template(self, intent: str) -> str:
         """Get a response template for the given intent"""
-        if intent in self.intents:
-            responses = self.intents[intent]["responses"]
-            import random
-            return random.choice(responses)
+        responses = self._templates.get(intent)
         
-        return "I'm not sure how to help with that. Can you please rephrase your question?"
+        return random.choice(responses) if responses else FALLBACK_RESPONSE
 
     def extract_entities(self, message: str) -> Dict[str, Any]:
         """Extract specific entities like dates, amounts, categories"""
         if not self.nlp:
             return {}
         
-        doc = self.nlp(message)
+        cached = self._extracted_cache.get(message)
+        if cached is None:
+            cached = self._extract_entities(message)
+            self._extracted_cache.set(message, cached)
+        
+        # Fresh containers so callers can't alter the cached result
+        return {key: list(values) for key, values in cached.items()}
+
+    def _extract_entities(self, message: str) -> Dict[str, Any]:
+        """Uncached body of extract_entities"""
         entities = {}
         
         # Extract monetary amounts
-        money_pattern = re.compile(r'\$?(\d+(?:,\d{3})*(?:\.\d{2})?)')
-        amounts = money_pattern.findall(message)
+        amounts = MONEY_RE.findall(message)
         if amounts:
             entities['amounts'] = [float(amount.replace(',', '')) for amount in amounts]
         
         # Extract dates
         dates = []
-        for ent in doc.ents:
-            if ent.label_ in ["DATE", "TIME"]:
-                dates.append(ent.text)
+        for text, label, _, _ in self._get_entities(message):
+            if label in DATE_LABELS:
+                dates.append(text)
         if dates:
             entities['dates'] = dates
         
-        # Extract categories (predefined list)
-        categories = [
-            "food", "dining", "restaurant", "grocery", "shopping", "gas", "transportation",
-            "entertainment", "bills", "utilities", "healthcare", "insurance", "rent",
-            "mortgage", "salary", "income", "investment", "savings"
-        ]
-        
-        found_categories = []
-        message_lower = message.lower()
-        for category in categories:
-            if category in message_lower:
-                found_categories.append(category)
+        # Extract categories (predefined list), keeping list order
+        found = {index for _, index in self._category_automaton.iter(message.lower())}
+        found_categories = [CATEGORY_KEYWORDS[index] for index in sorted(found)]
         
         if found_categories:
             entities['categories'] = found_categories
@@ -4,10 +4,12 @@ Finance Assistant Backend
 """
 
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
 from dotenv import load_dotenv
@@ -34,6 +36,8 @@ from app.middlewares.logging_middleware import LoggingMiddleware
 # Import database
 from app.models.database import engine, Base
 from app.utils.ml_model_loader import load_models
+from app.chatbot.intent_classifier import intent_classifier
+from app.utils.redis_cache import close_redis
 
 # Configure logging
 logging.basicConfig(
@@ -42,6 +46,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Parsed once at import rather than inside the middleware setup call chain
+CORS_ORIGINS = tuple(os.getenv("CORS_ORIGINS", "http://localhost:3000").split(","))
+ALLOWED_HOSTS = tuple(os.getenv("ALLOWED_HOSTS", "localhost").split(","))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
@@ -49,17 +57,24 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Finance Assistant Backend...")
     
     # Create database tables
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables created")
     
     # Load ML models
     await load_models()
     logger.info("ML models loaded")
     
+    # Warm the chatbot NLP pipeline off the event loop
+    await asyncio.to_thread(intent_classifier.warmup)
+    logger.info("Chatbot NLP pipeline warmed up")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Finance Assistant Backend...")
+    await engine.dispose()
+    await close_redis()
 
 # Create FastAPI application
 app = FastAPI(
@@ -68,6 +83,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -77,7 +93,7 @@ security = HTTPBearer()
 # Middleware configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=os.getenv("CORS_ORIGINS", "http://localhost:3000").split(","),
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -85,7 +101,7 @@ app.add_middleware(
 
 app.add_middleware(
     TrustedHostMiddleware,
-    allowed_hosts=os.getenv("ALLOWED_HOSTS", "localhost").split(",")
+    allowed_hosts=ALLOWED_HOSTS
 )
 
 app.add_middleware(AuthMiddleware)
@@ -5,10 +5,10 @@ Authentication Middleware
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import logging
 
-from app.utils.security import verify_token, is_token_expired
+from app.utils.security import decode_and_validate, TokenExpiredError
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +49,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
             authorization = request.headers.get("Authorization")
             
             if not authorization:
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": "Authorization header required"}
                 )
@@ -59,34 +59,32 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 scheme, token = authorization.split()
                 
                 if scheme.lower() != "bearer":
-                    return JSONResponse(
+                    return ORJSONResponse(
                         status_code=status.HTTP_401_UNAUTHORIZED,
                         content={"detail": "Invalid authentication scheme"}
                     )
                 
-                # Verify token
-                payload = verify_token(token)
-                
-                # Check if token is expired
-                if is_token_expired(token):
-                    return JSONResponse(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        content={"detail": "Token has expired"}
-                    )
+                # Verify signature and expiry with a single decode
+                payload = decode_and_validate(token)
                 
                 # Add user info to request state
                 request.state.user_id = payload.get("sub")
                 request.state.user_role = payload.get("role", "user")
                 
+            except TokenExpiredError:
+                return ORJSONResponse(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    content={"detail": "Token has expired"}
+                )
             except ValueError as e:
-                logger.warning(f"Invalid token: {str(e)}")
-                return JSONResponse(
+                logger.warning("Invalid token: %s", e)
+                return ORJSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": "Invalid token"}
                 )
             except Exception as e:
-                logger.error(f"Authentication error: {str(e)}")
-                return JSONResponse(
+                logger.error("Authentication error: %s", e)
+                return ORJSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": "Authentication failed"}
                 )
@@ -3,44 +3,62 @@ Logging Middleware
 """
 
 import logging
+import secrets
 import time
-import uuid
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
 logger = logging.getLogger(__name__)
 
+# Health probes hit constantly by load balancers / k8s; not worth a log line
+UNLOGGED_PATHS = frozenset({"/health"})
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     """Middleware to log HTTP requests and responses"""
 
+    def __init__(self, app):
+        super().__init__(app)
+        # Log level is fixed at startup, so check it once instead of per call
+        self._info_enabled = logger.isEnabledFor(logging.INFO)
+
     async def dispatch(self, request: Request, call_next):
         """Process request and log details"""
         
         # Generate request ID
-        request_id = str(uuid.uuid4())
+        request_id = secrets.token_hex(8)
+        
+        if request.url.path in UNLOGGED_PATHS:
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id
+            return response
         
         # Log request
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        logger.info(
-            f"[{request_id}] {request.method} {request.url.path} - "
-            f"IP: {request.client.host} - "
-            f"User-Agent: {request.headers.get('user-agent', 'unknown')}"
-        )
+        if self._info_enabled:
+            logger.info(
+                "[%s] %s %s - IP: %s - User-Agent: %s",
+                request_id,
+                request.method,
+                request.url.path,
+                request.client.host,
+                request.headers.get('user-agent', 'unknown')
+            )
         
         # Process request
         try:
             response = await call_next(request)
             
             # Calculate processing time
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             
             # Log response
-            logger.info(
-                f"[{request_id}] Response: {response.status_code} - "
-                f"Time: {process_time:.3f}s"
-            )
+            if self._info_enabled:
+                logger.info(
+                    "[%s] Response: %s - Time: %.3fs",
+                    request_id, response.status_code, process_time
+                )
             
             # Add request ID to response headers
             response.headers["X-Request-ID"] = request_id
@@ -49,9 +67,9 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             
         except Exception as e:
             # Log error
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             logger.error(
-                f"[{request_id}] Error: {str(e)} - "
-                f"Time: {process_time:.3f}s"
+                "[%s] Error: %s - Time: %.3fs",
+                request_id, e, process_time
             )
             raise
\ No newline at end of file
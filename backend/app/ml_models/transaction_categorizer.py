@@ -2,90 +2,152 @@
 Transaction Categorization ML Model
 """
 
-import pickle
+import copy
+import joblib
 import pandas as pd
 import numpy as np
+from scipy.sparse import hstack
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import re
 import os
 
-from app.models.transaction import TransactionCategory
+from app.models.transaction import TransactionCategory, CATEGORY_BY_VALUE
+from app.utils.text_matching import build_automaton
+
+# Bumped whenever the feature layout changes; saved models with another
+# version are retrained instead of being fed incompatible features
+MODEL_VERSION = 2
+
+# Passes over the training data for a full (re)train
+TRAINING_EPOCHS = 20
+
+# Every category the classifier may ever learn, fixed up front so that
+# incremental updates can introduce categories unseen at initial training
+ALL_CATEGORIES = np.array([category.value for category in TransactionCategory])
+
+# Special characters and numbers stripped during preprocessing
+NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+
+SUBCATEGORY_KEYWORDS = {
+    "food_dining": {
+        "restaurant": ["restaurant", "cafe", "bistro", "grill"],
+        "fast_food": ["mcdonalds", "burger", "pizza", "subway"],
+        "grocery": ["grocery", "supermarket", "walmart", "target"],
+        "coffee": ["starbucks", "coffee", "dunkin"]
+    },
+    "shopping": {
+        "clothing": ["clothing", "apparel", "fashion", "shoes"],
+        "electronics": ["electronics", "apple", "best buy", "amazon"],
+        "household": ["home", "furniture", "kitchen", "bath"]
+    },
+    "transportation": {
+        "gas": ["gas", "fuel", "exxon", "shell", "bp"],
+        "public_transit": ["metro", "bus", "train", "uber", "lyft"],
+        "parking": ["parking", "toll"]
+    }
+}
+
+def _subcategory_keyword_index():
+    """
+    Invert SUBCATEGORY_KEYWORDS to keyword -> {category: (priority, subcategory)},
+    where priority is the subcategory's declaration order within its category
+    """
+    index = {}
+    for category, subcategories in SUBCATEGORY_KEYWORDS.items():
+        for priority, (subcategory, keywords) in enumerate(subcategories.items()):
+            for keyword in keywords:
+                index.setdefault(keyword, {})[category] = (priority, subcategory)
+    return index.items()
+
+_SUBCATEGORY_AUTOMATON = build_automaton(_subcategory_keyword_index())
 
 class TransactionCategorizer:
     def __init__(self):
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
             ngram_range=(1, 2),
-            stop_words='english'
-        )
-        self.classifier = RandomForestClassifier(
-            n_estimators=100,
-            random_state=42,
-            max_depth=10
+            stop_words='english',
+            sublinear_tf=True,
+            dtype=np.float32
         )
+        self.classifier = self._new_classifier()
         self.is_trained = False
+        self._weights_mapped = False
         self.model_path = "app/ml_models/categorizer_model.pkl"
         
-        # Load model if exists
-        self._load_model()
+        # Model is loaded (or trained) on first prediction, not at import time
+        self._model_loaded = False
+
+    @staticmethod
+    def _new_classifier() -> SGDClassifier:
+        """
+        Linear model: one sparse dot product per prediction, a small pickle,
+        and partial_fit for incremental updates
+        """
+        return SGDClassifier(loss='log_loss', random_state=42)
 
     def preprocess_text(self, description: str, merchant_name: str = None) -> str:
         """Preprocess transaction description and merchant name"""
-        text = description.lower()
-        
-        if merchant_name:
-            text += " " + merchant_name.lower()
-        
-        # Remove special characters and numbers
-        text = re.sub(r'[^a-zA-Z\s]', ' ', text)
+        text = description + " " + merchant_name if merchant_name else description
         
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        return text
+        # Remove special characters and numbers, then extra whitespace
+        return ' '.join(NON_ALPHA_RE.sub(' ', text.lower()).split())
+
+    def preprocess_batch(
+        self,
+        descriptions: List[str],
+        merchant_names: List[Optional[str]]
+    ) -> List[str]:
+        """Preprocess many description/merchant pairs in one pass"""
+        preprocess = self.preprocess_text
+        return [
+            preprocess(description, merchant_name)
+            for description, merchant_name in zip(descriptions, merchant_names)
+        ]
 
     def extract_features(self, descriptions: List[str], amounts: List[float] = None) -> np.ndarray:
-        """Extract features from transaction descriptions"""
-        # Text features using TF-IDF
-        text_features = self.vectorizer.fit_transform(descriptions)
-        
+        """Extract features from transaction descriptions using the fitted vocabulary"""
+        return self._combine_features(self.vectorizer.transform(descriptions), amounts)
+
+    def _fit_extract_features(self, descriptions: List[str], amounts: List[float] = None) -> np.ndarray:
+        """Fit the TF-IDF vocabulary and extract features (training only)"""
+        return self._combine_features(self.vectorizer.fit_transform(descriptions), amounts)
+
+    def _combine_features(self, text_features, amounts: List[float] = None):
+        """Append the amount column to the text features"""
         if amounts is not None:
-            # Amount features
-            amount_features = np.array(amounts).reshape(-1, 1)
+            # Amount features, log-scaled to sit on the same range as TF-IDF weights;
+            # signed so refunds/negative amounts stay finite (log1p(x) is NaN for x < -1)
+            amounts = np.asarray(amounts, dtype=np.float32)
+            amount_features = (np.sign(amounts) * np.log1p(np.abs(amounts))).reshape(-1, 1)
             
             # Combine text and amount features
-            from scipy.sparse import hstack
-            features = hstack([text_features, amount_features])
-            return features
+            return hstack([text_features, amount_features]).tocsr()
         
         return text_features
 
     def train_model(self, training_data: List[Dict[str, Any]]):
-        """Train the categorization model"""
+        """Train the categorization model from scratch"""
+        self._model_loaded = True
+        
         if not training_data:
             # Use mock training data for demonstration
             training_data = self._get_mock_training_data()
         
         # Prepare data
-        descriptions = []
-        amounts = []
-        categories = []
-        
-        for item in training_data:
-            processed_desc = self.preprocess_text(
-                item['description'],
-                item.get('merchant_name')
-            )
-            descriptions.append(processed_desc)
-            amounts.append(item['amount'])
-            categories.append(item['category'])
+        descriptions = self.preprocess_batch(
+            [item['description'] for item in training_data],
+            [item.get('merchant_name') for item in training_data]
+        )
+        amounts = [item['amount'] for item in training_data]
+        categories = [item['category'] for item in training_data]
         
         # Extract features
-        X = self.extract_features(descriptions, amounts)
+        X = self._fit_extract_features(descriptions, amounts)
         y = categories
         
         # Split data
@@ -94,7 +156,10 @@ class TransactionCategorizer:
         )
         
         # Train model
-        self.classifier.fit(X_train, y_train)
+        self.classifier = self._new_classifier()
+        self._weights_mapped = False
+        for _ in range(TRAINING_EPOCHS):
+            self.classifier.partial_fit(X_train, y_train, classes=ALL_CATEGORIES)
         
         # Evaluate
         y_pred = self.classifier.predict(X_test)
@@ -104,6 +169,35 @@ class TransactionCategorizer:
         self.is_trained = True
         self._save_model()
 
+    def update_model(self, samples: List[Dict[str, Any]]):
+        """
+        Incrementally train on new labelled samples (e.g. user corrections)
+        without refitting the vocabulary or revisiting earlier data
+        """
+        self._ensure_model_loaded()
+        
+        if not self.is_trained:
+            self.train_model(samples)
+            return
+        
+        if not samples:
+            return
+        
+        descriptions = self.preprocess_batch(
+            [item['description'] for item in samples],
+            [item.get('merchant_name') for item in samples]
+        )
+        X = self.extract_features(descriptions, [item['amount'] for item in samples])
+        
+        # A loaded model's weights are read-only memory maps shared with other
+        # workers; partial_fit updates them in place, so take a private copy
+        if self._weights_mapped:
+            self.classifier = copy.deepcopy(self.classifier)
+            self._weights_mapped = False
+        
+        self.classifier.partial_fit(X, [item['category'] for item in samples])
+        self._save_model()
+
     def predict_category(
         self,
         description: str,
@@ -111,37 +205,63 @@ class TransactionCategorizer:
         merchant_name: str = None
     ) -> Dict[str, Any]:
         """Predict transaction category"""
+        return self.predict_categories([{
+            "description": description,
+            "amount": amount,
+            "merchant_name": merchant_name
+        }])[0]
+
+    def predict_categories(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Predict categories for many transactions with a single predict_proba call.
+        Each item needs 'description' and 'amount'; 'merchant_name' is optional.
+        """
+        self._ensure_model_loaded()
+        
         if not self.is_trained:
             # Return default category with low confidence
-            return {
-                "category": TransactionCategory.OTHER_EXPENSE,
-                "subcategory": None,
-                "confidence": 0.1
-            }
+            return [
+                {
+                    "category": TransactionCategory.OTHER_EXPENSE,
+                    "subcategory": None,
+                    "confidence": 0.1
+                }
+                for _ in items
+            ]
+        
+        if not items:
+            return []
         
         # Preprocess
-        processed_desc = self.preprocess_text(description, merchant_name)
+        processed_descs = self.preprocess_batch(
+            [item["description"] for item in items],
+            [item.get("merchant_name") for item in items]
+        )
+        amounts = [item["amount"] for item in items]
         
         # Extract features
-        text_features = self.vectorizer.transform([processed_desc])
-        amount_features = np.array([[amount]])
-        
-        from scipy.sparse import hstack
-        features = hstack([text_features, amount_features])
+        features = self.extract_features(processed_descs, amounts)
         
-        # Predict
-        prediction = self.classifier.predict(features)[0]
-        probabilities = self.classifier.predict_proba(features)[0]
-        confidence = max(probabilities)
+        # Predict; label and confidence both come from the probabilities
+        probabilities = self.classifier.predict_proba(features)
+        best = probabilities.argmax(axis=1)
+        predictions = self.classifier.classes_[best]
+        confidences = probabilities[np.arange(len(items)), best]
         
-        # Determine subcategory based on keywords
-        subcategory = self._determine_subcategory(description, merchant_name, prediction)
+        results = []
+        for item, prediction, confidence in zip(items, predictions, confidences):
+            # Determine subcategory based on keywords
+            subcategory = self._determine_subcategory(
+                item["description"], item.get("merchant_name"), prediction
+            )
+            
+            results.append({
+                "category": CATEGORY_BY_VALUE[prediction],
+                "subcategory": subcategory,
+                "confidence": float(confidence)
+            })
         
-        return {
-            "category": TransactionCategory(prediction),
-            "subcategory": subcategory,
-            "confidence": float(confidence)
-        }
+        return results
 
     def _determine_subcategory(
         self,
@@ -152,32 +272,17 @@ class TransactionCategorizer:
         """Determine subcategory based on keywords"""
         text = (description + " " + (merchant_name or "")).lower()
         
-        subcategory_keywords = {
-            "food_dining": {
-                "restaurant": ["restaurant", "cafe", "bistro", "grill"],
-                "fast_food": ["mcdonalds", "burger", "pizza", "subway"],
-                "grocery": ["grocery", "supermarket", "walmart", "target"],
-                "coffee": ["starbucks", "coffee", "dunkin"]
-            },
-            "shopping": {
-                "clothing": ["clothing", "apparel", "fashion", "shoes"],
-                "electronics": ["electronics", "apple", "best buy", "amazon"],
-                "household": ["home", "furniture", "kitchen", "bath"]
-            },
-            "transportation": {
-                "gas": ["gas", "fuel", "exxon", "shell", "bp"],
-                "public_transit": ["metro", "bus", "train", "uber", "lyft"],
-                "parking": ["parking", "toll"]
-            }
-        }
-        
-        category_map = subcategory_keywords.get(category, {})
-        
-        for subcategory, keywords in category_map.items():
-            if any(keyword in text for keyword in keywords):
-                return subcategory
+        # One pass over the text finds every keyword; the first subcategory
+        # (in declaration order) with a hit wins
+        best = None
+        for _, categories in _SUBCATEGORY_AUTOMATON.iter(text):
+            hit = categories.get(category)
+            if hit is not None and (best is None or hit < best):
+                best = hit
+                if best[0] == 0:
+                    break
         
-        return None
+        return best[1] if best is not None else None
 
     def _get_mock_training_data(self) -> List[Dict[str, Any]]:
         """Generate mock training data for demonstration"""
@@ -218,6 +323,12 @@ class TransactionCategorizer:
             
         ] * 10  # Multiply to have more training data
 
+    def _ensure_model_loaded(self):
+        """Load the model from disk, or train one, the first time it is needed"""
+        if not self._model_loaded:
+            self._model_loaded = True
+            self._load_model()
+
     def _save_model(self):
         """Save trained model to disk"""
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
@@ -225,22 +336,32 @@ class TransactionCategorizer:
         model_data = {
             'vectorizer': self.vectorizer,
             'classifier': self.classifier,
-            'is_trained': self.is_trained
+            'is_trained': self.is_trained,
+            'version': MODEL_VERSION
         }
         
-        with open(self.model_path, 'wb') as f:
-            pickle.dump(model_data, f)
+        # Write to a temporary file and swap it in: other workers may have the
+        # current file memory-mapped, and truncating it under them would crash them
+        tmp_path = f"{self.model_path}.tmp"
+        joblib.dump(model_data, tmp_path, compress=0)
+        os.replace(tmp_path, self.model_path)
 
     def _load_model(self):
         """Load trained model from disk"""
         if os.path.exists(self.model_path):
             try:
-                with open(self.model_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                # Memory-map the numpy arrays so worker processes share their pages
+                model_data = joblib.load(self.model_path, mmap_mode='r')
+                
+                if model_data.get('version') != MODEL_VERSION:
+                    print("Saved model is outdated, training new model...")
+                    self.train_model([])
+                    return
                 
                 self.vectorizer = model_data['vectorizer']
                 self.classifier = model_data['classifier']
                 self.is_trained = model_data['is_trained']
+                self._weights_mapped = True
                 
                 print("Loaded existing transaction categorization model")
             except Exception as e:
@@ -2,10 +2,11 @@
 Account Model
 """
 
-from sqlalchemy import Column, Integer, String, Decimal, DateTime, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Decimal, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
+from app.models.types import Cents, StringEnum
 import enum
 
 class AccountType(enum.Enum):
@@ -17,19 +18,22 @@ class AccountType(enum.Enum):
 
 class Account(Base):
     __tablename__ = "accounts"
+    __table_args__ = (
+        Index("idx_user_active", "user_id", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Account details
     name = Column(String(255), nullable=False)
-    account_type = Column(Enum(AccountType), nullable=False)
+    account_type = Column(StringEnum(AccountType, "ck_account_type"), nullable=False)
     institution_name = Column(String(255), nullable=False)
     account_number = Column(String(255), nullable=True)  # Encrypted
     routing_number = Column(String(255), nullable=True)  # Encrypted
     
     # Balance information
-    current_balance = Column(Decimal(15, 2), default=0.00)
+    current_balance = Column(Cents, default=0)
     available_balance = Column(Decimal(15, 2), default=0.00)
     credit_limit = Column(Decimal(15, 2), nullable=True)
     
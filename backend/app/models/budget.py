@@ -2,10 +2,11 @@
 Budget and Goal Models
 """
 
-from sqlalchemy import Column, Integer, String, Decimal, DateTime, ForeignKey, Enum, Boolean, Text
+from sqlalchemy import Column, Integer, String, Decimal, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
+from app.models.types import Cents, StringEnum
 import enum
 
 class BudgetPeriod(enum.Enum):
@@ -16,6 +17,9 @@ class BudgetPeriod(enum.Enum):
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index("idx_user_period_active", "user_id", "period", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -23,13 +27,13 @@ class Budget(Base):
     # Budget details
     name = Column(String(255), nullable=False)
     category = Column(String(100), nullable=False)
-    amount = Column(Decimal(15, 2), nullable=False)
-    period = Column(Enum(BudgetPeriod), nullable=False)
+    amount = Column(Cents, nullable=False)
+    period = Column(StringEnum(BudgetPeriod, "ck_budget_period"), nullable=False)
     
     # Status and tracking
     is_active = Column(Boolean, default=True)
     alert_threshold = Column(Decimal(5, 2), default=80.0)  # Alert at 80% of budget
-    current_spent = Column(Decimal(15, 2), default=0.00)
+    current_spent = Column(Cents, default=0)
     
     # Dates
     start_date = Column(DateTime(timezone=True), nullable=False)
@@ -63,7 +67,7 @@ class Goal(Base):
     # Goal details
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    goal_type = Column(Enum(GoalType), nullable=False)
+    goal_type = Column(StringEnum(GoalType, "ck_goal_type"), nullable=False)
     target_amount = Column(Decimal(15, 2), nullable=False)
     current_amount = Column(Decimal(15, 2), default=0.00)
     
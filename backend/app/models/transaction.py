@@ -2,10 +2,11 @@
 Transaction Model
 """
 
-from sqlalchemy import Column, Integer, String, Decimal, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Decimal, DateTime, ForeignKey, Text, Boolean, Index, Computed
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
+from app.models.types import Cents, StringEnum
 import enum
 
 class TransactionType(enum.Enum):
@@ -37,16 +38,47 @@ class TransactionCategory(enum.Enum):
     TRANSFER_IN = "transfer_in"
     TRANSFER_OUT = "transfer_out"
 
+# Direct value -> member table for the categorization hot path
+CATEGORY_BY_VALUE = {category.value: category for category in TransactionCategory}
+
+# Types that raise / lower an account balance; anything else leaves it unchanged
+INCOME_TYPES = frozenset({TransactionType.INCOME})
+EXPENSE_TYPES = frozenset({TransactionType.EXPENSE})
+
+def _sql_values(types) -> str:
+    """Quoted, comma-separated stored values of a set of transaction types"""
+    return ", ".join(sorted(f"'{transaction_type.value}'" for transaction_type in types))
+
+# Signed balance effect of a row, computed and stored by the database
+SIGNED_AMOUNT_SQL = (
+    f"CASE WHEN transaction_type IN ({_sql_values(INCOME_TYPES)}) THEN amount "
+    f"WHEN transaction_type IN ({_sql_values(EXPENSE_TYPES)}) THEN -amount "
+    f"ELSE 0 END"
+)
+
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Listing/summary filters: account scope, optional category, date range
+        Index("idx_account_date", "account_id", "transaction_date"),
+        Index("idx_account_category_date", "account_id", "category", "transaction_date"),
+        # Type-filtered windows (expense/income totals in the chatbot and summaries)
+        Index("idx_account_type_date", "account_id", "transaction_type", "transaction_date"),
+        # Pending-status filter (MySQL has no partial indexes, so lead with the flag)
+        Index("idx_account_pending_date", "account_id", "is_pending", "transaction_date"),
+        # Covers per-account balance sums without touching the table rows
+        Index("idx_account_signed_amount", "account_id", "signed_amount"),
+        Index("idx_plaid_transaction_id", "plaid_transaction_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     
     # Transaction details
-    amount = Column(Decimal(15, 2), nullable=False)
-    transaction_type = Column(Enum(TransactionType), nullable=False)
-    category = Column(Enum(TransactionCategory), nullable=False)
+    amount = Column(Cents, nullable=False)
+    signed_amount = Column(Cents, Computed(SIGNED_AMOUNT_SQL, persisted=True))
+    transaction_type = Column(StringEnum(TransactionType, "ck_transaction_type"), nullable=False)
+    category = Column(StringEnum(TransactionCategory, "ck_transaction_category"), nullable=False)
     subcategory = Column(String(100), nullable=True)
     
     # Description and metadata
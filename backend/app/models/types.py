@@ -0,0 +1,43 @@
+"""
+Custom Column Types
+"""
+
+import enum
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Type
+from sqlalchemy import BigInteger, Enum
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+class Cents(TypeDecorator):
+    """Money stored as a BIGINT number of cents, exposed to Python as Decimal"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        
+        return int(Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        
+        # SUM() over BIGINT comes back as DECIMAL from MySQL; both convert exactly
+        return Decimal(value).scaleb(-2)
+
+def StringEnum(enum_class: Type[enum.Enum], name: str) -> Enum:
+    """Enum stored as a short VARCHAR of its values, guarded by a CHECK constraint"""
+    values = [member.value for member in enum_class]
+    
+    return Enum(
+        enum_class,
+        name=name,
+        native_enum=False,
+        create_constraint=True,
+        length=max(len(value) for value in values),
+        values_callable=lambda members: [member.value for member in members]
+    )
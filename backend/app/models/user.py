@@ -2,10 +2,11 @@
 User Model
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
+from app.models.types import StringEnum
 import enum
 
 class UserRole(enum.Enum):
@@ -23,7 +24,7 @@ class User(Base):
     last_name = Column(String(100), nullable=False)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
-    role = Column(Enum(UserRole), default=UserRole.USER)
+    role = Column(StringEnum(UserRole, "ck_user_role"), default=UserRole.USER)
     
     # MFA fields
     mfa_secret = Column(String(255), nullable=True)
@@ -40,10 +41,11 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
     
-    # Relationships
-    accounts = relationship("Account", back_populates="user", cascade="all, delete-orphan")
-    budgets = relationship("Budget", back_populates="user", cascade="all, delete-orphan")
-    goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
+    # Relationships (selectin: one IN query per collection when a User is loaded,
+    # and usable under AsyncSession where implicit lazy loads are not)
+    accounts = relationship("Account", back_populates="user", lazy="selectin", cascade="all, delete-orphan")
+    budgets = relationship("Budget", back_populates="user", lazy="selectin", cascade="all, delete-orphan")
+    goals = relationship("Goal", back_populates="user", lazy="selectin", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}', role='{self.role.value}')>"
\ No newline at end of file
@@ -2,24 +2,34 @@
 Authentication Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
 
 from app.models.database import get_db
-from app.schemas.user_schemas import UserCreate, UserLogin, UserResponse, MFASetup, MFAVerify
+from app.schemas.user_schemas import (
+    UserCreate, UserLogin, UserResponse, MFASetup, MFAVerify, USER_RESPONSE_ADAPTER
+)
 from app.services.auth_service import AuthService
 from app.services.user_service import UserService
-from app.utils.security import verify_token
+from app.utils.security import decode_and_validate
+from app.routes.dependencies import security, json_body, json_body_openapi
+from app.utils.redis_cache import cache_get, cache_set, invalidate_user_cache, user_cache_key
+from app.utils.http_cache import weak_etag, is_not_modified, set_cache_headers, not_modified
 
 router = APIRouter()
-security = HTTPBearer()
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=json_body_openapi(UserCreate)
+)
 async def register(
-    user_data: UserCreate,
-    db: Session = Depends(get_db)
+    user_data: UserCreate = Depends(json_body(UserCreate)),
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
     user_service = UserService(db)
@@ -33,13 +43,18 @@ async def register(
     
     # Create user
     user = await user_service.create_user(user_data)
-    return user
+    
+    return Response(
+        content=USER_RESPONSE_ADAPTER.dump_json(USER_RESPONSE_ADAPTER.validate_python(user)),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json"
+    )
 
-@router.post("/login")
+@router.post("/login", openapi_extra=json_body_openapi(UserLogin))
 async def login(
-    login_data: UserLogin,
     request: Request,
-    db: Session = Depends(get_db)
+    login_data: UserLogin = Depends(json_body(UserLogin)),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Authenticate user and return tokens"""
     auth_service = AuthService(db)
@@ -61,7 +76,7 @@ async def login(
 async def login_with_mfa(
     mfa_data: MFAVerify,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Complete MFA authentication"""
     auth_service = AuthService(db)
@@ -83,7 +98,7 @@ async def login_with_mfa(
 @router.post("/refresh")
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, str]:
     """Refresh access token using refresh token"""
     auth_service = AuthService(db)
@@ -100,7 +115,7 @@ async def refresh_token(
 @router.post("/logout")
 async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Logout user and invalidate tokens"""
     auth_service = AuthService(db)
@@ -116,24 +131,41 @@ async def logout(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current authenticated user"""
     try:
-        payload = verify_token(credentials.credentials)
+        payload = decode_and_validate(credentials.credentials)
         user_id = payload.get("sub")
         
-        user_service = UserService(db)
-        user = await user_service.get_user_by_id(int(user_id))
+        cache_key = user_cache_key(int(user_id), "me")
+        user_data = await cache_get(cache_key)
         
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+        if user_data is None:
+            user_service = UserService(db)
+            user = await user_service.get_user_by_id(int(user_id))
+            
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            
+            user_data = USER_RESPONSE_ADAPTER.dump_python(
+                USER_RESPONSE_ADAPTER.validate_python(user), mode="json"
             )
+            await cache_set(cache_key, user_data)
+        
+        etag = weak_etag(user_data)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
         
-        return user
+        # Already shaped by the adapter, so skip the response_model pass
+        response = ORJSONResponse(user_data)
+        set_cache_headers(response, etag)
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -143,15 +175,16 @@ async def get_current_user(
 @router.post("/mfa/setup", response_model=MFASetup)
 async def setup_mfa(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Setup MFA for user"""
     try:
-        payload = verify_token(credentials.credentials)
+        payload = decode_and_validate(credentials.credentials)
         user_id = payload.get("sub")
         
         auth_service = AuthService(db)
         mfa_setup = await auth_service.setup_mfa(int(user_id))
+        await invalidate_user_cache(int(user_id), "me")
         
         return mfa_setup
     except Exception as e:
@@ -164,11 +197,11 @@ async def setup_mfa(
 async def verify_mfa_setup(
     mfa_data: MFAVerify,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify and enable MFA"""
     try:
-        payload = verify_token(credentials.credentials)
+        payload = decode_and_validate(credentials.credentials)
         user_id = payload.get("sub")
         
         auth_service = AuthService(db)
@@ -176,6 +209,7 @@ async def verify_mfa_setup(
             user_id=int(user_id),
             token=mfa_data.token
         )
+        await invalidate_user_cache(int(user_id), "me")
         
         return {"message": "MFA enabled successfully", "backup_codes": result}
     except Exception as e:
@@ -187,15 +221,16 @@ async def verify_mfa_setup(
 @router.delete("/mfa/disable")
 async def disable_mfa(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Disable MFA for user"""
     try:
-        payload = verify_token(credentials.credentials)
+        payload = decode_and_validate(credentials.credentials)
         user_id = payload.get("sub")
         
         auth_service = AuthService(db)
         await auth_service.disable_mfa(int(user_id))
+        await invalidate_user_cache(int(user_id), "me")
         
         return {"message": "MFA disabled successfully"}
     except Exception as e:
@@ -2,18 +2,18 @@
 Chatbot Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ConfigDict
 from typing import Dict, Any, List, Optional
 
 from app.models.database import get_db
 from app.services.chatbot_service import ChatbotService
-from app.utils.security import verify_token
+from app.routes.dependencies import get_current_user_id
+from app.utils.http_cache import weak_etag, is_not_modified, set_cache_headers, not_modified
 
 router = APIRouter()
-security = HTTPBearer()
 
 class ChatMessage(BaseModel):
     message: str
@@ -27,23 +27,14 @@ class ChatResponse(BaseModel):
     conversation_id: str
     chart_data: Optional[Dict[str, Any]] = None
     actions: Optional[List[Dict[str, Any]]] = None
-
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
-    """Get current user ID from token"""
-    try:
-        payload = verify_token(credentials.credentials)
-        return int(payload.get("sub"))
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
+    
+    model_config = ConfigDict(frozen=True, extra="forbid")
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_bot(
     chat_message: ChatMessage,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Chat with the financial assistant bot"""
     chatbot_service = ChatbotService(db, user_id)
@@ -54,7 +45,9 @@ async def chat_with_bot(
             conversation_id=chat_message.conversation_id
         )
         
-        return ChatResponse(**response)
+        # Chart values are numpy arrays: serialize them with orjson directly
+        # (response_model still documents the shape)
+        return ORJSONResponse(response)
         
     except Exception as e:
         raise HTTPException(
@@ -64,21 +57,30 @@ async def chat_with_bot(
 
 @router.get("/conversations")
 async def get_conversations(
+    request: Request,
+    response: Response,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user's chat conversation history"""
     chatbot_service = ChatbotService(db, user_id)
     
     conversations = await chatbot_service.get_conversation_history()
     
-    return {"conversations": conversations}
+    result = {"conversations": conversations}
+    
+    etag = weak_etag(result)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    set_cache_headers(response, etag)
+    return result
 
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a conversation"""
     chatbot_service = ChatbotService(db, user_id)
@@ -96,7 +98,7 @@ async def delete_conversation(
 @router.get("/suggestions")
 async def get_chat_suggestions(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get personalized chat suggestions based on user's financial data"""
     chatbot_service = ChatbotService(db, user_id)
@@ -109,7 +111,7 @@ async def get_chat_suggestions(
 async def submit_chat_feedback(
     feedback_data: Dict[str, Any],
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Submit feedback on chatbot responses"""
     chatbot_service = ChatbotService(db, user_id)
@@ -0,0 +1,47 @@
+"""
+Shared Route Dependencies
+"""
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel, ValidationError
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+
+from app.utils.security import decode_and_validate
+
+security = HTTPBearer()
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """Get current user ID from token"""
+    try:
+        payload = decode_and_validate(credentials.credentials)
+        return int(payload.get("sub"))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+def json_body(model: Type[ModelT]) -> Callable[[Request], Awaitable[ModelT]]:
+    """Dependency validating the raw request body straight into `model` (no dict step)"""
+    async def parse(request: Request) -> ModelT:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+    
+    return parse
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra documenting a json_body() request body"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
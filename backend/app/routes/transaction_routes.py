@@ -2,71 +2,102 @@
 Transaction Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import (
+    APIRouter, Depends, HTTPException, status, Query, Request, Response,
+    BackgroundTasks, UploadFile, File
+)
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Sequence
+import logging
+import uuid
 
-from app.models.database import get_db
+from app.models.database import get_db, SessionLocal
 from app.schemas.transaction_schemas import (
-    TransactionCreate, TransactionUpdate, TransactionResponse,
+    TransactionCreate, TransactionUpdate, TransactionResponse, TransactionListItem,
     TransactionFilter, TransactionSummary, CategorizeTransactionRequest,
     CategorizeTransactionResponse
 )
 from app.services.transaction_service import TransactionService
-from app.utils.security import verify_token
+from app.routes.dependencies import get_current_user_id
 from app.utils.pagination import paginate
+from app.utils.redis_cache import (
+    cache_get, cache_set, invalidate_user_cache, user_cache_key, get_user_version
+)
+from app.utils.http_cache import weak_etag, is_not_modified, set_cache_headers, not_modified
+from app.utils.cursor import encode_cursor, decode_cursor
 
 router = APIRouter()
-security = HTTPBearer()
+logger = logging.getLogger(__name__)
 
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
-    """Get current user ID from token"""
-    try:
-        payload = verify_token(credentials.credentials)
-        return int(payload.get("sub"))
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
+# Cached per-user reads derived from transaction data
+TRANSACTION_DERIVED_CACHES = ("summary",)
+
+# Summary entries are versioned by the transactions fingerprint, so they
+# can live much longer than the default look-aside TTL
+SUMMARY_CACHE_TTL_SECONDS = 3600
+
+# How long a finished CSV import's result stays queryable
+IMPORT_STATUS_TTL_SECONDS = 3600
+
+# Built once so each list page reuses one compiled validator/serializer
+TransactionListItem.model_rebuild()
+TRANSACTION_ITEM_ADAPTER = TypeAdapter(TransactionListItem)
+
+# Response header carrying the cursor for the following page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_transaction_list(rows: Sequence) -> bytes:
+    """Encode transaction rows as a JSON array"""
+    return b"[" + b",".join(
+        TRANSACTION_ITEM_ADAPTER.dump_json(TRANSACTION_ITEM_ADAPTER.validate_python(row))
+        for row in rows
+    ) + b"]"
 
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction_data: TransactionCreate,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new transaction"""
     transaction_service = TransactionService(db)
     
-    # Verify account belongs to user
-    if not await transaction_service.verify_account_ownership(
-        account_id=transaction_data.account_id,
-        user_id=user_id
-    ):
+    transaction = await transaction_service.create_transaction(transaction_data, user_id)
+    
+    if not transaction:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account not found or access denied"
         )
     
-    transaction = await transaction_service.create_transaction(transaction_data)
+    await invalidate_user_cache(user_id, *TRANSACTION_DERIVED_CACHES)
     return transaction
 
-@router.get("/", response_model=List[TransactionResponse])
+@router.get("/", response_model=List[TransactionListItem])
 async def get_transactions(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     account_id: Optional[int] = Query(None),
     category: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None),
     size: int = Query(20, ge=1, le=100)
 ):
-    """Get user's transactions with filtering and pagination"""
+    """Get user's transactions with filtering and cursor pagination"""
     transaction_service = TransactionService(db)
     
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     # Build filter
     filter_params = TransactionFilter(
         account_id=account_id,
@@ -78,17 +109,30 @@ async def get_transactions(
     transactions = await transaction_service.get_user_transactions(
         user_id=user_id,
         filters=filter_params,
-        page=page,
+        cursor=position,
         size=size
     )
     
-    return transactions
+    # A full page may have a successor; its cursor is the last row's position
+    headers = {}
+    if len(transactions) == size:
+        last = transactions[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["transaction_date"], last["id"])
+    
+    # Returning a Response directly skips FastAPI's per-item response_model pass;
+    # response_model stays on the decorator for the OpenAPI schema
+    return Response(
+        content=encode_transaction_list(transactions),
+        media_type="application/json",
+        headers=headers
+    )
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: int,
+    request: Request,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific transaction"""
     transaction_service = TransactionService(db)
@@ -104,14 +148,24 @@ async def get_transaction(
             detail="Transaction not found"
         )
     
-    return transaction
+    # Validator over the serialized row itself: updated_at only resolves whole
+    # seconds, so two edits within one second would otherwise share an ETag
+    transaction_data = TransactionResponse.model_validate(transaction).model_dump(mode="json")
+    etag = weak_etag(transaction_data)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    # Already shaped by the schema, so skip the response_model pass
+    response = ORJSONResponse(transaction_data)
+    set_cache_headers(response, etag)
+    return response
 
 @router.put("/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(
     transaction_id: int,
     transaction_data: TransactionUpdate,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a transaction"""
     transaction_service = TransactionService(db)
@@ -128,13 +182,15 @@ async def update_transaction(
             detail="Transaction not found"
         )
     
+    await invalidate_user_cache(user_id, *TRANSACTION_DERIVED_CACHES)
+    
     return transaction
 
 @router.delete("/{transaction_id}")
 async def delete_transaction(
     transaction_id: int,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a transaction"""
     transaction_service = TransactionService(db)
@@ -150,31 +206,58 @@ async def delete_transaction(
             detail="Transaction not found"
         )
     
+    await invalidate_user_cache(user_id, *TRANSACTION_DERIVED_CACHES)
+    
     return {"message": "Transaction deleted successfully"}
 
 @router.get("/summary/stats", response_model=TransactionSummary)
 async def get_transaction_summary(
+    request: Request,
+    response: Response,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None)
 ):
     """Get transaction summary and statistics"""
     transaction_service = TransactionService(db)
     
+    # Cheap version check first. TIMESTAMP columns only resolve whole seconds,
+    # so the database fingerprint alone can miss two same-second edits; the
+    # per-user counter bumped on every write covers those, and the fingerprint
+    # (with its net amount) still catches writes that skipped the bump.
+    # The trend window moves daily, hence today's date.
+    data_version = await get_user_version(user_id)
+    fingerprint = await transaction_service.get_transactions_fingerprint(user_id)
+    etag = weak_etag(data_version, *fingerprint, start_date, end_date, date.today())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    set_cache_headers(response, etag)
+    
+    # One hash per user, one field per (date range, data version) via the ETag
+    cache_key = user_cache_key(user_id, "summary")
+    cache_field = etag
+    cached = await cache_get(cache_key, cache_field)
+    if cached is not None:
+        return cached
+    
     summary = await transaction_service.get_transaction_summary(
         user_id=user_id,
         start_date=start_date,
         end_date=end_date
     )
     
-    return summary
+    summary_data = summary.model_dump(mode="json")
+    await cache_set(cache_key, summary_data, field=cache_field, ttl=SUMMARY_CACHE_TTL_SECONDS)
+    
+    return summary_data
 
 @router.post("/categorize", response_model=CategorizeTransactionResponse)
 async def categorize_transaction(
     categorize_data: CategorizeTransactionRequest,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Automatically categorize a transaction using ML"""
     transaction_service = TransactionService(db)
@@ -182,14 +265,35 @@ async def categorize_transaction(
     result = await transaction_service.categorize_transaction(categorize_data)
     return result
 
-@router.post("/import/csv")
+def import_status_key(user_id: int, job_id: str) -> str:
+    """Build the cache key holding a CSV import job's status"""
+    return user_cache_key(user_id, f"import:{job_id}")
+
+async def run_csv_import(job_id: str, user_id: int, account_id: int, content: bytes):
+    """Background CSV import; runs after the response on its own session"""
+    key = import_status_key(user_id, job_id)
+    await cache_set(key, {"status": "running"}, ttl=IMPORT_STATUS_TTL_SECONDS)
+    
+    try:
+        async with SessionLocal() as db:
+            result = await TransactionService(db).import_transactions_csv(account_id, content)
+    except Exception as e:
+        logger.error("CSV import %s failed: %s", job_id, e)
+        await cache_set(key, {"status": "failed", "error": str(e)}, ttl=IMPORT_STATUS_TTL_SECONDS)
+        return
+    
+    await invalidate_user_cache(user_id, *TRANSACTION_DERIVED_CACHES)
+    await cache_set(key, {"status": "completed", **result}, ttl=IMPORT_STATUS_TTL_SECONDS)
+
+@router.post("/import/csv", status_code=status.HTTP_202_ACCEPTED)
 async def import_transactions_csv(
     account_id: int,
-    # file: UploadFile = File(...),  # Would handle CSV file upload
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Import transactions from CSV file"""
+    """Queue a CSV file of transactions for import"""
     transaction_service = TransactionService(db)
     
     # Verify account ownership
@@ -199,31 +303,49 @@ async def import_transactions_csv(
             detail="Account not found or access denied"
         )
     
-    # Mock implementation - would process CSV file
-    return {
-        "message": "CSV import functionality would be implemented here",
-        "imported_count": 0,
-        "errors": []
-    }
+    content = await file.read()
+    job_id = uuid.uuid4().hex
+    
+    await cache_set(import_status_key(user_id, job_id), {"status": "queued"}, ttl=IMPORT_STATUS_TTL_SECONDS)
+    background_tasks.add_task(run_csv_import, job_id, user_id, account_id, content)
+    
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/import/{job_id}")
+async def get_import_status(
+    job_id: str,
+    user_id: int = Depends(get_current_user_id)
+):
+    """Get the status of a queued CSV import"""
+    job = await cache_get(import_status_key(user_id, job_id))
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    return job
 
 @router.post("/sync/{account_id}")
 async def sync_account_transactions(
     account_id: int,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Sync transactions from external bank API"""
     transaction_service = TransactionService(db)
     
-    # Verify account ownership
-    if not await transaction_service.verify_account_ownership(account_id, user_id):
+    # Mock implementation - would sync with bank API
+    result = await transaction_service.sync_transactions_from_bank(account_id, user_id)
+    
+    if result is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account not found or access denied"
         )
     
-    # Mock implementation - would sync with bank API
-    result = await transaction_service.sync_transactions_from_bank(account_id)
+    await invalidate_user_cache(user_id, *TRANSACTION_DERIVED_CACHES)
     
     return {
         "message": "Account transactions synced successfully",
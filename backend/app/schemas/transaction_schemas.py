@@ -2,7 +2,7 @@
 Transaction Pydantic Schemas
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
@@ -41,8 +41,16 @@ class TransactionResponse(TransactionBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, extra="forbid")
+
+class TransactionAccount(BaseModel):
+    id: int
+    name: str
+    
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+class TransactionListItem(TransactionResponse):
+    account: TransactionAccount
 
 class TransactionFilter(BaseModel):
     account_id: Optional[int] = None
@@ -62,6 +70,8 @@ class TransactionSummary(BaseModel):
     transaction_count: int
     top_categories: List[dict]
     monthly_trend: List[dict]
+    
+    model_config = ConfigDict(frozen=True, extra="forbid")
 
 class CategorizeTransactionRequest(BaseModel):
     description: str = Field(..., min_length=1, max_length=500)
@@ -71,4 +81,6 @@ class CategorizeTransactionRequest(BaseModel):
 class CategorizeTransactionResponse(BaseModel):
     category: TransactionCategory
     subcategory: Optional[str] = None
-    confidence_score: float = Field(..., ge=0.0, le=1.0)
\ No newline at end of file
+    confidence_score: float = Field(..., ge=0.0, le=1.0)
+    
+    model_config = ConfigDict(use_enum_values=True, frozen=True, extra="forbid")
\ No newline at end of file
@@ -2,7 +2,7 @@
 User Pydantic Schemas
 """
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter, field_validator
 from typing import Optional, List
 from datetime import datetime
 from app.models.user import UserRole
@@ -17,15 +17,31 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str = Field(..., min_length=8, max_length=128)
     
-    @validator('password')
-    def validate_password(cls, v):
+    @field_validator('password')
+    @classmethod
+    def validate_password(cls, v: str) -> str:
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isupper() for c in v):
+        
+        # One pass over the password, stopping once every class has been seen
+        has_upper = has_lower = has_digit = False
+        for c in v:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+            else:
+                continue
+            if has_upper and has_lower and has_digit:
+                break
+        
+        if not has_upper:
             raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
+        if not has_lower:
             raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
+        if not has_digit:
             raise ValueError('Password must contain at least one digit')
         return v
 
@@ -46,8 +62,7 @@ class UserResponse(UserBase):
     created_at: datetime
     last_login: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -72,4 +87,7 @@ class MFADisable(BaseModel):
     token: str = Field(..., min_length=6, max_length=6)
 
 class BackupCodesResponse(BaseModel):
-    codes: List[str]
\ No newline at end of file
+    codes: List[str]
+
+# Built once; routes validate/serialize users through it instead of per-call model setup
+USER_RESPONSE_ADAPTER = TypeAdapter(UserResponse)
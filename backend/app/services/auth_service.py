@@ -2,21 +2,48 @@
 Authentication Service
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.orm import raiseload, load_only
 from typing import Dict, Any, Optional, List
 import pyotp
 import qrcode
+from qrcode.image.svg import SvgPathImage
 import io
 import base64
 import json
 import secrets
 
 from app.models.user import User
-from app.utils.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.utils.security import (
+    verify_password_async, get_password_hash, create_access_token, create_refresh_token,
+    verify_token
+)
+from app.utils.redis_cache import invalidate_user_cache
 from app.utils.encryption import encrypt_data, decrypt_data
+from app.utils.totp import cached_totp_key, verify_totp
+
+# Auth flows only touch User's own columns; skip its eager-loaded collections
+USER_COLUMNS_ONLY = (raiseload("*"),)
+
+# Login reads only the credential/status columns and those echoed in the response
+USER_LOGIN_COLUMNS = (
+    load_only(
+        User.id, User.hashed_password, User.is_active, User.mfa_enabled,
+        User.email, User.first_name, User.last_name, User.role
+    ),
+    *USER_COLUMNS_ONLY
+)
+
+# MFA enrolment QR code; SVG paths are written as text, no PIL/PNG encoding
+QR_CODE_OPTIONS = {"version": 1, "box_size": 10, "border": 5, "image_factory": SvgPathImage}
+
+# MFA backup codes: count and random bytes per code (8 hex characters)
+BACKUP_CODE_COUNT = 10
+BACKUP_CODE_BYTES = 4
 
 class AuthService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     async def authenticate_user(
@@ -26,9 +53,12 @@ class AuthService:
         ip_address: str = None
     ) -> Dict[str, Any]:
         """Authenticate user credentials"""
-        user = self.db.query(User).filter(User.email == email).first()
+        # users.email has a case-insensitive collation, so plain equality is a
+        # case-insensitive lookup on its unique index (no LOWER() needed)
+        result = await self.db.execute(select(User).where(User.email == email).options(*USER_LOGIN_COLUMNS))
+        user = result.scalars().first()
         
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             raise ValueError("Invalid email or password")
         
         if not user.is_active:
@@ -54,7 +84,8 @@ class AuthService:
         
         # Update last login
         user.last_login = func.now()
-        self.db.commit()
+        await self.db.commit()
+        await invalidate_user_cache(user.id, "me")
         
         return {
             "access_token": access_token,
@@ -92,7 +123,7 @@ class AuthService:
 
     async def setup_mfa(self, user_id: int) -> Dict[str, str]:
         """Setup MFA for user"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = await self.db.get(User, user_id, options=USER_COLUMNS_ONLY)
         
         if not user:
             raise ValueError("User not found")
@@ -110,22 +141,21 @@ class AuthService:
         )
         
         # Generate QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr = qrcode.QRCode(**QR_CODE_OPTIONS)
         qr.add_data(totp_uri)
         qr.make(fit=True)
         
-        img = qr.make_image(fill_color="black", back_color="white")
         buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
+        qr.make_image().save(buffer)
         qr_code_base64 = base64.b64encode(buffer.getvalue()).decode()
         
         # Store encrypted secret (temporarily, until verification)
         user.mfa_secret = encrypt_data(secret)
-        self.db.commit()
+        await self.db.commit()
         
         return {
             "secret": secret,
-            "qr_code": f"data:image/png;base64,{qr_code_base64}"
+            "qr_code": f"data:image/svg+xml;base64,{qr_code_base64}"
         }
 
     async def verify_and_enable_mfa(
@@ -134,32 +164,32 @@ class AuthService:
         token: str
     ) -> List[str]:
         """Verify MFA setup and enable it"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = await self.db.get(User, user_id, options=USER_COLUMNS_ONLY)
         
         if not user or not user.mfa_secret:
             raise ValueError("MFA setup not found")
         
-        # Decrypt secret
-        secret = decrypt_data(user.mfa_secret)
-        
-        # Verify token
-        totp = pyotp.TOTP(secret)
-        if not totp.verify(token):
+        # Verify token against the decrypted, pre-decoded HMAC key
+        if not verify_totp(cached_totp_key(user.mfa_secret, decrypt_data), token):
             raise ValueError("Invalid MFA token")
         
-        # Generate backup codes
-        backup_codes = [secrets.token_hex(4).upper() for _ in range(10)]
+        # Generate backup codes from one RNG read, sliced per code
+        raw = secrets.token_bytes(BACKUP_CODE_COUNT * BACKUP_CODE_BYTES)
+        backup_codes = [
+            raw[offset:offset + BACKUP_CODE_BYTES].hex().upper()
+            for offset in range(0, len(raw), BACKUP_CODE_BYTES)
+        ]
         
         # Enable MFA
         user.mfa_enabled = True
         user.backup_codes = encrypt_data(json.dumps(backup_codes))
-        self.db.commit()
+        await self.db.commit()
         
         return backup_codes
 
     async def disable_mfa(self, user_id: int):
         """Disable MFA for user"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = await self.db.get(User, user_id, options=USER_COLUMNS_ONLY)
         
         if not user:
             raise ValueError("User not found")
@@ -167,7 +197,7 @@ class AuthService:
         user.mfa_enabled = False
         user.mfa_secret = None
         user.backup_codes = None
-        self.db.commit()
+        await self.db.commit()
 
     async def refresh_tokens(self, refresh_token: str) -> Dict[str, str]:
         """Refresh access token"""
@@ -3,23 +3,39 @@ Chatbot Service
 """
 
 import uuid
+from functools import cached_property
 import json
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, select
+from sqlalchemy.orm import contains_eager
 
 from app.models.transaction import Transaction, TransactionType, TransactionCategory
 from app.models.account import Account
 from app.models.budget import Budget
 from app.chatbot.intent_classifier import intent_classifier
-from app.services.transaction_service import TransactionService
+from app.chatbot.intent_batcher import intent_batcher
+from app.services.transaction_service import TransactionService, INCOME_TOTAL, EXPENSE_TOTAL
+
+# Look-back period for spending, budget and savings replies
+ANALYSIS_WINDOW = timedelta(days=30)
 
 class ChatbotService:
-    def __init__(self, db: Session, user_id: int):
+    def __init__(self, db: AsyncSession, user_id: int):
         self.db = db
         self.user_id = user_id
-        self.transaction_service = TransactionService(db)
+        self._accounts: Optional[List[Account]] = None
+        
+        # One clock read per request so every analysis covers the same window
+        self._now = datetime.now()
+        self._window_start = self._now - ANALYSIS_WINDOW
+
+    @cached_property
+    def transaction_service(self) -> TransactionService:
+        """Transaction service on the same session, built only if a handler needs it"""
+        return TransactionService(self.db)
 
     async def process_message(
         self, 
@@ -32,11 +48,9 @@ class ChatbotService:
         if not conversation_id:
             conversation_id = str(uuid.uuid4())
         
-        # Classify intent
-        intent, confidence, entities = intent_classifier.classify_intent(message)
-        
-        # Extract additional entities
-        extracted_entities = intent_classifier.extract_entities(message)
+        # Classify intent and extract entities, coalesced with concurrent
+        # requests into one nlp.pipe() call on one worker thread
+        intent, confidence, entities, extracted_entities = await intent_batcher.classify(message)
         
         # Generate response based on intent
         response_data = await self._generate_response(intent, message, extracted_entities)
@@ -66,94 +80,116 @@ class ChatbotService:
         
         response_data = {"response": "", "chart_data": None, "actions": None}
         
-        if intent == "greeting":
-            response_data["response"] = intent_classifier.get_response_template(intent)
-            
-        elif intent == "balance_inquiry":
-            balance_info = await self._get_account_balances()
-            response_data["response"] = f"Here are your current account balances:\n{balance_info}"
-            response_data["chart_data"] = await self._get_balance_chart_data()
-            
-        elif intent == "spending_analysis":
-            spending_analysis = await self._get_spending_analysis(entities)
-            response_data["response"] = spending_analysis["text"]
-            response_data["chart_data"] = spending_analysis["chart_data"]
-            
-        elif intent == "budget_help":
-            budget_advice = await self._get_budget_advice()
-            response_data["response"] = budget_advice
-            
-        elif intent == "savings_advice":
-            savings_advice = await self._get_savings_advice()
-            response_data["response"] = savings_advice
-            
-        elif intent == "transaction_search":
-            transactions = await self._search_transactions(entities)
-            response_data["response"] = transactions["text"]
-            response_data["actions"] = transactions.get("actions")
-            
-        elif intent == "financial_goals":
-            goals_info = await self._get_financial_goals_info()
-            response_data["response"] = goals_info
-            
-        elif intent == "bill_reminders":
-            bill_reminders = await self._get_bill_reminders()
-            response_data["response"] = bill_reminders
-            
-        elif intent == "export_data":
-            export_info = await self._get_export_options()
-            response_data["response"] = export_info
-            response_data["actions"] = [
+        handler = INTENT_HANDLERS.get(intent, ChatbotService._respond_unknown)
+        response_data.update(await handler(self, intent, message, entities))
+        
+        return response_data
+
+    async def _respond_template(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Canned reply for conversational intents"""
+        return {"response": intent_classifier.get_response_template(intent)}
+
+    async def _respond_balance(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Account balances with a balance chart"""
+        balance_info = await self._get_account_balances()
+        return {
+            "response": f"Here are your current account balances:\n{balance_info}",
+            "chart_data": await self._get_balance_chart_data()
+        }
+
+    async def _respond_spending(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Spending breakdown with a category chart"""
+        spending_analysis = await self._get_spending_analysis(entities)
+        return {
+            "response": spending_analysis["text"],
+            "chart_data": spending_analysis["chart_data"]
+        }
+
+    async def _respond_budget(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Budget advice"""
+        return {"response": await self._get_budget_advice()}
+
+    async def _respond_savings(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Savings advice"""
+        return {"response": await self._get_savings_advice()}
+
+    async def _respond_search(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Transaction search results"""
+        transactions = await self._search_transactions(entities)
+        return {
+            "response": transactions["text"],
+            "actions": transactions.get("actions")
+        }
+
+    async def _respond_goals(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Financial goals help"""
+        return {"response": await self._get_financial_goals_info()}
+
+    async def _respond_bills(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Upcoming bill reminders"""
+        return {"response": await self._get_bill_reminders()}
+
+    async def _respond_export(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Export options with download actions"""
+        return {
+            "response": await self._get_export_options(),
+            "actions": [
                 {"type": "export", "format": "pdf", "label": "Download PDF Report"},
                 {"type": "export", "format": "excel", "label": "Download Excel Report"}
             ]
-            
-        elif intent == "help":
-            response_data["response"] = intent_classifier.get_response_template(intent)
-            
-        elif intent == "goodbye":
-            response_data["response"] = intent_classifier.get_response_template(intent)
-            
-        else:
-            response_data["response"] = "I'm not sure how to help with that. Try asking about your balance, spending, or budget!"
+        }
+
+    async def _respond_unknown(self, intent: str, message: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Fallback for intents without a handler"""
+        return {"response": "I'm not sure how to help with that. Try asking about your balance, spending, or budget!"}
+
+    async def _active_accounts(self) -> List[Account]:
+        """User's active accounts, queried once per service instance"""
+        if self._accounts is None:
+            result = await self.db.execute(
+                select(Account).where(
+                    Account.user_id == self.user_id,
+                    Account.is_active == True
+                )
+            )
+            self._accounts = list(result.scalars().all())
         
-        return response_data
+        return self._accounts
 
     async def _get_account_balances(self) -> str:
         """Get user's account balances"""
-        accounts = self.db.query(Account).filter(
-            Account.user_id == self.user_id,
-            Account.is_active == True
-        ).all()
+        accounts = await self._active_accounts()
         
         if not accounts:
             return "You don't have any active accounts."
         
-        balance_text = ""
+        lines = []
         total_balance = 0
         
         for account in accounts:
-            balance_text += f"• {account.name}: ${account.current_balance:,.2f}\n"
+            lines.append(f"• {account.name}: ${account.current_balance:,.2f}")
             if account.account_type.value != "credit_card":
                 total_balance += float(account.current_balance)
         
-        balance_text += f"\nTotal Balance: ${total_balance:,.2f}"
+        lines.append(f"\nTotal Balance: ${total_balance:,.2f}")
         
-        return balance_text
+        return "\n".join(lines)
 
     async def _get_balance_chart_data(self) -> Dict[str, Any]:
         """Get chart data for account balances"""
-        accounts = self.db.query(Account).filter(
-            Account.user_id == self.user_id,
-            Account.is_active == True
-        ).all()
+        accounts = await self._active_accounts()
         
         chart_data = {
             "type": "pie",
             "title": "Account Balances",
             "data": {
                 "labels": [account.name for account in accounts],
-                "values": [float(account.current_balance) for account in accounts]
+                # float64 array; ORJSONResponse serializes it natively
+                "values": np.fromiter(
+                    (account.current_balance for account in accounts),
+                    dtype=np.float64,
+                    count=len(accounts)
+                )
             }
         }
         
@@ -162,47 +198,52 @@ class ChatbotService:
     async def _get_spending_analysis(self, entities: Dict[str, Any]) -> Dict[str, Any]:
         """Get spending analysis based on entities"""
         # Default to last 30 days
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+        end_date = self._now
+        start_date = self._window_start
         
         # Check if user specified a date range
         if "dates" in entities:
             # Parse dates (simplified - would need proper date parsing)
             pass
         
-        # Get transactions
-        transactions = self.db.query(Transaction).join(Account).filter(
-            Account.user_id == self.user_id,
-            Transaction.transaction_type == TransactionType.EXPENSE,
-            Transaction.transaction_date >= start_date,
-            Transaction.transaction_date <= end_date
-        ).all()
+        # Category totals, grouped and ordered by the database
+        spent = func.sum(Transaction.amount).label("spent")
+        result = await self.db.execute(
+            select(Transaction.category, spent).join(Account).where(
+                Account.user_id == self.user_id,
+                Transaction.transaction_type == TransactionType.EXPENSE,
+                Transaction.transaction_date >= start_date,
+                Transaction.transaction_date <= end_date
+            ).group_by(Transaction.category).order_by(desc(spent))
+        )
+        sorted_categories = [(row.category.value, float(row.spent)) for row in result]
         
-        if not transactions:
+        if not sorted_categories:
             return {
                 "text": "No expenses found for the specified period.",
                 "chart_data": None
             }
         
-        # Calculate category totals
-        category_totals = {}
-        total_spent = 0
-        
-        for transaction in transactions:
-            category = transaction.category.value
-            amount = float(transaction.amount)
-            category_totals[category] = category_totals.get(category, 0) + amount
-            total_spent += amount
+        # One float64 array serves both the total and the chart values
+        amounts = np.fromiter(
+            (amount for _, amount in sorted_categories),
+            dtype=np.float64,
+            count=len(sorted_categories)
+        )
+        total_spent = float(amounts.sum())
         
         # Generate response text
-        response_text = f"Spending Analysis (Last 30 Days):\n"
-        response_text += f"Total Spent: ${total_spent:,.2f}\n\n"
-        response_text += "Top Categories:\n"
+        lines = [
+            "Spending Analysis (Last 30 Days):",
+            f"Total Spent: ${total_spent:,.2f}\n",
+            "Top Categories:"
+        ]
         
-        sorted_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)
         for category, amount in sorted_categories[:5]:
             percentage = (amount / total_spent) * 100
-            response_text += f"• {category.replace('_', ' ').title()}: ${amount:,.2f} ({percentage:.1f}%)\n"
+            lines.append(f"• {category.replace('_', ' ').title()}: ${amount:,.2f} ({percentage:.1f}%)")
+        
+        response_text = "\n".join(lines) + "\n"
         
         # Generate chart data
         chart_data = {
@@ -210,7 +251,7 @@ class ChatbotService:
             "title": "Spending by Category",
             "data": {
                 "labels": [cat.replace('_', ' ').title() for cat, _ in sorted_categories],
-                "values": [amount for _, amount in sorted_categories]
+                "values": amounts
             }
         }
         
@@ -222,19 +263,21 @@ class ChatbotService:
     async def _get_budget_advice(self) -> str:
         """Get budget advice based on user's spending patterns"""
         # Get recent spending
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        
-        transactions = self.db.query(Transaction).join(Account).filter(
-            Account.user_id == self.user_id,
-            Transaction.transaction_type == TransactionType.EXPENSE,
-            Transaction.transaction_date >= start_date
-        ).all()
+        start_date = self._window_start
+        
+        total_spent = await self.db.scalar(
+            select(func.sum(Transaction.amount)).select_from(Transaction).join(Account).where(
+                Account.user_id == self.user_id,
+                Transaction.transaction_type == TransactionType.EXPENSE,
+                Transaction.transaction_date >= start_date
+            )
+        )
         
-        if not transactions:
+        # SUM over no rows is NULL
+        if total_spent is None:
             return "I need some transaction data to provide budget advice. Start by adding some expenses!"
         
-        total_spent = sum(float(t.amount) for t in transactions)
+        total_spent = float(total_spent)
         monthly_average = total_spent  # Simplified - would calculate proper average
         
         advice = f"Budget Advice:\n\n"
@@ -251,20 +294,18 @@ class ChatbotService:
     async def _get_savings_advice(self) -> str:
         """Get personalized savings advice"""
         # Analyze income vs expenses
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        
-        income_total = self.db.query(func.sum(Transaction.amount)).join(Account).filter(
-            Account.user_id == self.user_id,
-            Transaction.transaction_type == TransactionType.INCOME,
-            Transaction.transaction_date >= start_date
-        ).scalar() or 0
-        
-        expense_total = self.db.query(func.sum(Transaction.amount)).join(Account).filter(
-            Account.user_id == self.user_id,
-            Transaction.transaction_type == TransactionType.EXPENSE,
-            Transaction.transaction_date >= start_date
-        ).scalar() or 0
+        start_date = self._window_start
+        
+        # Both totals from one pass over the joined rows
+        result = await self.db.execute(
+            select(INCOME_TOTAL, EXPENSE_TOTAL).select_from(Transaction).join(Account).where(
+                Account.user_id == self.user_id,
+                Transaction.transaction_date >= start_date
+            )
+        )
+        income_total, expense_total = result.one()
+        income_total = income_total or 0
+        expense_total = expense_total or 0
         
         net_income = float(income_total) - float(expense_total)
         
@@ -289,7 +330,10 @@ class ChatbotService:
 
     async def _search_transactions(self, entities: Dict[str, Any]) -> Dict[str, Any]:
         """Search transactions based on entities"""
-        query = self.db.query(Transaction).join(Account).filter(
+        # Populate transaction.account from the join already needed for the user filter
+        query = select(Transaction).join(Account).options(
+            contains_eager(Transaction.account)
+        ).where(
             Account.user_id == self.user_id
         )
         
@@ -307,7 +351,7 @@ class ChatbotService:
                 )
             if amount_conditions:
                 from sqlalchemy import or_
-                query = query.filter(or_(*amount_conditions))
+                query = query.where(or_(*amount_conditions))
         
         if "categories" in entities:
             # Search for specific categories
@@ -316,7 +360,10 @@ class ChatbotService:
             pass
         
         # Limit results
-        transactions = query.order_by(desc(Transaction.transaction_date)).limit(10).all()
+        result = await self.db.execute(
+            query.order_by(desc(Transaction.transaction_date)).limit(10)
+        )
+        transactions = result.scalars().all()
         
         if not transactions:
             return {
@@ -324,10 +371,13 @@ class ChatbotService:
                 "actions": None
             }
         
-        response_text = f"Found {len(transactions)} recent transactions:\n\n"
+        lines = [f"Found {len(transactions)} recent transactions:\n"]
         for transaction in transactions:
-            response_text += f"• {transaction.transaction_date.strftime('%m/%d')} - "
-            response_text += f"{transaction.description}: ${transaction.amount:,.2f}\n"
+            lines.append(
+                f"• {transaction.transaction_date.strftime('%m/%d')} - "
+                f"{transaction.description}: ${transaction.amount:,.2f}"
+            )
+        response_text = "\n".join(lines) + "\n"
         
         return {
             "text": response_text,
@@ -412,4 +462,19 @@ class ChatbotService:
     async def record_feedback(self, feedback_data: Dict[str, Any]):
         """Record user feedback on chatbot responses"""
         # Would save feedback to database for model improvement
-        pass
\ No newline at end of file
+        pass
+
+# Intent -> response handler, looked up once per message in _generate_response
+INTENT_HANDLERS = {
+    "greeting": ChatbotService._respond_template,
+    "balance_inquiry": ChatbotService._respond_balance,
+    "spending_analysis": ChatbotService._respond_spending,
+    "budget_help": ChatbotService._respond_budget,
+    "savings_advice": ChatbotService._respond_savings,
+    "transaction_search": ChatbotService._respond_search,
+    "financial_goals": ChatbotService._respond_goals,
+    "bill_reminders": ChatbotService._respond_bills,
+    "export_data": ChatbotService._respond_export,
+    "help": ChatbotService._respond_template,
+    "goodbye": ChatbotService._respond_template,
+}
@@ -2,27 +2,70 @@
 Transaction Service
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import and_, or_, func, desc, select, insert, update, case, cast, exists, literal, null, union_all, String, JSON
+from sqlalchemy.engine import RowMapping
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
+import csv
+import io
 from decimal import Decimal
 
-from app.models.transaction import Transaction, TransactionType, TransactionCategory
+from app.models.transaction import (
+    Transaction, TransactionType, TransactionCategory, CATEGORY_BY_VALUE, INCOME_TYPES, EXPENSE_TYPES
+)
 from app.models.account import Account
 from app.schemas.transaction_schemas import (
-    TransactionCreate, TransactionUpdate, TransactionFilter,
+    TransactionCreate, TransactionUpdate, TransactionResponse, TransactionFilter,
     TransactionSummary, CategorizeTransactionRequest, CategorizeTransactionResponse
 )
-from app.ml_models.transaction_categorizer import TransactionCategorizer
+from app.ml_models.transaction_categorizer import categorizer
+
+# Exactly the columns TransactionResponse serialises; listings read these with
+# Core selects so no ORM instances are built or tracked per row
+TRANSACTION_RESPONSE_COLUMNS = tuple(
+    Transaction.__table__.c[name] for name in TransactionResponse.model_fields
+)
+
+# Nested account snippet for listings, assembled by the database from the
+# already-joined accounts row instead of being correlated in Python
+ACCOUNT_SNIPPET = func.json_object(
+    'id', Account.id,
+    'name', Account.name,
+    type_=JSON
+).label('account')
+
+# Aggregates shared by the summary totals and the monthly trend
+INCOME_TOTAL = func.sum(case(
+    (Transaction.transaction_type.in_(INCOME_TYPES), Transaction.amount),
+    else_=0
+))
+EXPENSE_TOTAL = func.sum(case(
+    (Transaction.transaction_type.in_(EXPENSE_TYPES), Transaction.amount),
+    else_=0
+))
+# Income minus expenses (transfers are neutral), from the stored signed column
+NET_TOTAL = func.sum(Transaction.signed_amount)
+TRANSACTION_MONTH = func.date_format(Transaction.transaction_date, '%Y-%m')
+
+# Compiled once; validates each CSV import row
+TRANSACTION_CREATE_ADAPTER = TypeAdapter(TransactionCreate)
 
 class TransactionService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.categorizer = TransactionCategorizer()
+        # Shared instance: the model is loaded once per process, not per request
+        self.categorizer = categorizer
+        # Ownership answers for this service's (i.e. this request's) lifetime
+        self._ownership: Dict[Tuple[int, int], bool] = {}
 
-    async def create_transaction(self, transaction_data: TransactionCreate) -> Transaction:
-        """Create a new transaction"""
+    async def create_transaction(
+        self,
+        transaction_data: TransactionCreate,
+        user_id: int
+    ) -> Optional[Transaction]:
+        """Create a new transaction (None if the account is not the user's)"""
         # Auto-categorize if not provided or confidence is low
         if not hasattr(transaction_data, 'category') or not transaction_data.category:
             categorization = await self.categorize_transaction(
@@ -32,74 +75,106 @@ class TransactionService:
                     merchant_name=transaction_data.merchant_name
                 )
             )
-            transaction_data.category = categorization.category
+            transaction_data.category = CATEGORY_BY_VALUE[categorization.category]
             transaction_data.subcategory = categorization.subcategory
         
-        # Create transaction
-        transaction = Transaction(**transaction_data.dict())
-        self.db.add(transaction)
-        self.db.commit()
-        self.db.refresh(transaction)
+        # Create transaction: INSERT ... SELECT from the user's account row, so
+        # the ownership check rides on the insert instead of a preflight query
+        values = transaction_data.model_dump(exclude={'account_id'})
+        columns = Transaction.__table__.c
+        result = await self.db.execute(
+            insert(Transaction).from_select(
+                ['account_id', *values],
+                select(
+                    Account.id,
+                    *(literal(value, columns[name].type) for name, value in values.items())
+                ).where(
+                    and_(Account.id == transaction_data.account_id, Account.user_id == user_id)
+                )
+            )
+        )
+        
+        if result.rowcount == 0:
+            return None
         
-        # Update account balance
-        await self._update_account_balance(transaction.account_id, transaction)
+        # Update account balance, committed together with the insert
+        await self._update_account_balance(
+            transaction_data.account_id,
+            transaction_data.transaction_type,
+            transaction_data.amount
+        )
+        await self.db.commit()
         
-        return transaction
+        return await self.db.get(Transaction, result.lastrowid)
 
     async def get_user_transactions(
         self,
         user_id: int,
         filters: TransactionFilter,
-        page: int = 1,
+        cursor: Optional[Tuple[datetime, int]] = None,
         size: int = 20
-    ) -> List[Transaction]:
+    ) -> List[RowMapping]:
         """Get user's transactions with filtering"""
-        query = self.db.query(Transaction).join(Account).filter(
+        query = select(*TRANSACTION_RESPONSE_COLUMNS, ACCOUNT_SNIPPET).join(Account).where(
             Account.user_id == user_id
         )
         
         # Apply filters
         if filters.account_id:
-            query = query.filter(Transaction.account_id == filters.account_id)
+            query = query.where(Transaction.account_id == filters.account_id)
         
         if filters.transaction_type:
-            query = query.filter(Transaction.transaction_type == filters.transaction_type)
+            query = query.where(Transaction.transaction_type == filters.transaction_type)
         
         if filters.category:
-            query = query.filter(Transaction.category == filters.category)
+            query = query.where(Transaction.category == filters.category)
         
         if filters.min_amount:
-            query = query.filter(Transaction.amount >= filters.min_amount)
+            query = query.where(Transaction.amount >= filters.min_amount)
         
         if filters.max_amount:
-            query = query.filter(Transaction.amount <= filters.max_amount)
+            query = query.where(Transaction.amount <= filters.max_amount)
         
         if filters.start_date:
-            query = query.filter(Transaction.transaction_date >= filters.start_date)
+            query = query.where(Transaction.transaction_date >= filters.start_date)
         
         if filters.end_date:
-            query = query.filter(Transaction.transaction_date <= filters.end_date)
+            query = query.where(Transaction.transaction_date <= filters.end_date)
         
         if filters.merchant_name:
-            query = query.filter(Transaction.merchant_name.ilike(f"%{filters.merchant_name}%"))
+            query = query.where(Transaction.merchant_name.ilike(f"%{filters.merchant_name}%"))
         
         if filters.is_pending is not None:
-            query = query.filter(Transaction.is_pending == filters.is_pending)
-        
-        # Order by date (newest first) and paginate
-        query = query.order_by(desc(Transaction.transaction_date))
-        offset = (page - 1) * size
-        
-        return query.offset(offset).limit(size).all()
+            query = query.where(Transaction.is_pending == filters.is_pending)
+        
+        # Keyset pagination: resume strictly after the previous page's last
+        # (date, id) so the cost of a page does not grow with its depth.
+        # Spelled out rather than a row comparison, which MySQL may not
+        # resolve with an index range scan.
+        if cursor:
+            cursor_date, cursor_id = cursor
+            query = query.where(or_(
+                Transaction.transaction_date < cursor_date,
+                and_(Transaction.transaction_date == cursor_date, Transaction.id < cursor_id)
+            ))
+        
+        # Order by date (newest first); id breaks ties so the order is total
+        query = query.order_by(desc(Transaction.transaction_date), desc(Transaction.id))
+        
+        result = await self.db.execute(query.limit(size))
+        return result.mappings().all()
 
     async def get_transaction_by_id(self, transaction_id: int, user_id: int) -> Optional[Transaction]:
         """Get a specific transaction"""
-        return self.db.query(Transaction).join(Account).filter(
-            and_(
-                Transaction.id == transaction_id,
-                Account.user_id == user_id
+        result = await self.db.execute(
+            select(Transaction).join(Account).where(
+                and_(
+                    Transaction.id == transaction_id,
+                    Account.user_id == user_id
+                )
             )
-        ).first()
+        )
+        return result.scalars().first()
 
     async def update_transaction(
         self,
@@ -113,20 +188,20 @@ class TransactionService:
         if not transaction:
             return None
         
-        # Store old amount for balance update
-        old_amount = transaction.amount
-        old_type = transaction.transaction_type
+        # Store old balance effect for the balance update
+        old_delta = self._balance_delta(transaction.transaction_type, transaction.amount)
         
         # Update fields
-        for field, value in update_data.dict(exclude_unset=True).items():
+        for field, value in update_data.model_dump(exclude_unset=True).items():
             setattr(transaction, field, value)
         
-        self.db.commit()
-        self.db.refresh(transaction)
+        # Shift the balance by the change in effect, committed with the edit
+        delta = self._balance_delta(transaction.transaction_type, transaction.amount) - old_delta
+        if delta:
+            await self._adjust_account_balance(transaction.account_id, delta)
         
-        # Update account balance if amount or type changed
-        if old_amount != transaction.amount or old_type != transaction.transaction_type:
-            await self._recalculate_account_balance(transaction.account_id)
+        await self.db.commit()
+        await self.db.refresh(transaction)
         
         return transaction
 
@@ -137,13 +212,13 @@ class TransactionService:
         if not transaction:
             return False
         
-        account_id = transaction.account_id
+        # Take the transaction's effect back out of the balance
+        delta = self._balance_delta(transaction.transaction_type, transaction.amount)
+        if delta:
+            await self._adjust_account_balance(transaction.account_id, -delta)
         
-        self.db.delete(transaction)
-        self.db.commit()
-        
-        # Recalculate account balance
-        await self._recalculate_account_balance(account_id)
+        await self.db.delete(transaction)
+        await self.db.commit()
         
         return True
 
@@ -154,55 +229,87 @@ class TransactionService:
         end_date: Optional[str] = None
     ) -> TransactionSummary:
         """Get transaction summary and statistics"""
-        query = self.db.query(Transaction).join(Account).filter(
-            Account.user_id == user_id
-        )
+        conditions = [Account.user_id == user_id]
         
         if start_date:
-            query = query.filter(Transaction.transaction_date >= start_date)
+            conditions.append(Transaction.transaction_date >= start_date)
         
         if end_date:
-            query = query.filter(Transaction.transaction_date <= end_date)
-        
-        transactions = query.all()
-        
-        # Calculate totals
-        total_income = sum(
-            t.amount for t in transactions
-            if t.transaction_type == TransactionType.INCOME
-        )
-        
-        total_expenses = sum(
-            t.amount for t in transactions
-            if t.transaction_type == TransactionType.EXPENSE
-        )
-        
-        net_income = total_income - total_expenses
-        
-        # Top categories
-        category_totals = {}
-        for transaction in transactions:
-            if transaction.transaction_type == TransactionType.EXPENSE:
-                category = transaction.category.value
-                category_totals[category] = category_totals.get(category, 0) + float(transaction.amount)
-        
-        top_categories = [
-            {"category": k, "amount": v}
-            for k, v in sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:5]
-        ]
-        
-        # Monthly trend (last 6 months)
-        monthly_trend = await self._get_monthly_trend(user_id)
+            conditions.append(Transaction.transaction_date <= end_date)
+        
+        # Totals, top expense categories and the monthly trend come back as
+        # tagged rows of a single UNION ALL, i.e. one database round trip
+        totals_query = select(
+            literal('totals').label('kind'),
+            literal(None, String).label('label'),
+            INCOME_TOTAL.label('income'),
+            EXPENSE_TOTAL.label('expenses'),
+            NET_TOTAL.label('net'),
+            func.count(Transaction.id).label('count')
+        ).select_from(Transaction).join(Account).where(*conditions)
+        
+        categories_query = select(
+            literal('category').label('kind'),
+            cast(Transaction.category, String).label('label'),
+            null().label('income'),
+            func.sum(Transaction.amount).label('expenses'),
+            null().label('net'),
+            null().label('count')
+        ).select_from(Transaction).join(Account).where(
+            *conditions,
+            Transaction.transaction_type == TransactionType.EXPENSE
+        ).group_by(Transaction.category).order_by(desc('expenses')).limit(5).subquery()
+        
+        result = await self.db.execute(union_all(
+            totals_query,
+            select(categories_query),
+            self._monthly_trend_query(user_id)
+        ))
+        
+        totals = None
+        top_categories = []
+        monthly_trend = []
+        for row in result:
+            if row.kind == 'totals':
+                totals = row
+            elif row.kind == 'category':
+                top_categories.append({"category": row.label, "amount": float(row.expenses)})
+            else:
+                monthly_trend.append(self._monthly_trend_entry(row))
+        
+        # UNION ALL does not preserve the members' ordering
+        top_categories.sort(key=lambda item: item["amount"], reverse=True)
+        monthly_trend.sort(key=lambda item: item["month"])
+        
+        total_income = totals.income or Decimal('0.00')
+        total_expenses = totals.expenses or Decimal('0.00')
+        net_income = totals.net or Decimal('0.00')
         
         return TransactionSummary(
             total_income=total_income,
             total_expenses=total_expenses,
             net_income=net_income,
-            transaction_count=len(transactions),
+            transaction_count=totals.count,
             top_categories=top_categories,
             monthly_trend=monthly_trend
         )
 
+    async def get_transactions_fingerprint(
+        self,
+        user_id: int
+    ) -> Tuple[Optional[datetime], int, Optional[Decimal]]:
+        """Latest change time, row count and net amount of the user's transactions (ETag input)"""
+        result = await self.db.execute(
+            select(
+                func.max(func.coalesce(Transaction.updated_at, Transaction.created_at)),
+                func.count(Transaction.id),
+                NET_TOTAL
+            ).select_from(Transaction).join(Account).where(Account.user_id == user_id)
+        )
+        last_change, row_count, net = result.one()
+        
+        return last_change, row_count, net
+
     async def categorize_transaction(
         self,
         request: CategorizeTransactionRequest
@@ -222,94 +329,193 @@ class TransactionService:
 
     async def verify_account_ownership(self, account_id: int, user_id: int) -> bool:
         """Verify that account belongs to user"""
-        account = self.db.query(Account).filter(
-            and_(Account.id == account_id, Account.user_id == user_id)
-        ).first()
-        
-        return account is not None
+        key = (account_id, user_id)
+        if key not in self._ownership:
+            # EXISTS: a single boolean back, no account row to hydrate
+            self._ownership[key] = bool(await self.db.scalar(
+                select(exists().where(
+                    and_(Account.id == account_id, Account.user_id == user_id)
+                ))
+            ))
+        
+        return self._ownership[key]
+
+    async def import_transactions_csv(self, account_id: int, content: bytes) -> Dict[str, Any]:
+        """Validate CSV rows and insert the valid ones in one batched statement"""
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+        
+        records = []
+        errors = []
+        for line_number, row in enumerate(reader, start=2):
+            try:
+                transaction = TRANSACTION_CREATE_ADAPTER.validate_python({
+                    **{key: value for key, value in row.items() if value != ""},
+                    "account_id": account_id
+                })
+            except ValidationError as e:
+                errors.append({"row": line_number, "error": str(e)})
+                continue
+            
+            records.append(transaction.model_dump())
+        
+        if records:
+            # executemany: the driver folds this into multi-row INSERT statements;
+            # the balance moves by the batch's net effect in the same commit
+            await self.db.execute(insert(Transaction), records)
+            await self._adjust_account_balance(account_id, sum(
+                (self._balance_delta(record["transaction_type"], record["amount"]) for record in records),
+                Decimal('0.00')
+            ))
+            await self.db.commit()
+        
+        return {"imported_count": len(records), "errors": errors}
 
-    async def sync_transactions_from_bank(self, account_id: int) -> Dict[str, int]:
+    async def sync_transactions_from_bank(
+        self,
+        account_id: int,
+        user_id: int,
+        transactions: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[Dict[str, int]]:
         """Sync transactions from external bank API (mock implementation)"""
-        # This would integrate with bank APIs like Plaid
-        # For now, return mock data
+        # Stamping the sync time doubles as the ownership check
+        result = await self.db.execute(
+            update(Account).where(
+                and_(Account.id == account_id, Account.user_id == user_id)
+            ).values(last_synced=func.now())
+        )
+        
+        if result.rowcount == 0:
+            return None
+        
+        if not transactions:
+            await self.db.commit()
+            
+            # This would integrate with bank APIs like Plaid
+            # For now, return mock data
+            return {
+                "new_count": 5,
+                "updated_count": 2,
+                "error_count": 0
+            }
+        
+        records, error_count = self._prepare_bank_transactions(account_id, transactions)
+        
+        if records:
+            # One executemany insert and one balance adjustment for the batch,
+            # committed together with the sync stamp
+            await self.db.execute(insert(Transaction), records)
+            
+            await self._adjust_account_balance(account_id, sum(
+                (self._balance_delta(record["transaction_type"], record["amount"]) for record in records),
+                Decimal('0.00')
+            ))
+        
+        await self.db.commit()
         
         return {
-            "new_count": 5,
-            "updated_count": 2,
-            "error_count": 0
+            "new_count": len(records),
+            "updated_count": 0,
+            "error_count": error_count
         }
 
-    async def _update_account_balance(self, account_id: int, transaction: Transaction):
-        """Update account balance after transaction"""
-        account = self.db.query(Account).filter(Account.id == account_id).first()
-        
-        if account:
-            if transaction.transaction_type == TransactionType.INCOME:
-                account.current_balance += transaction.amount
-            elif transaction.transaction_type == TransactionType.EXPENSE:
-                account.current_balance -= transaction.amount
+    def _prepare_bank_transactions(
+        self,
+        account_id: int,
+        transactions: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Validate bank feed rows and categorize the uncategorized ones in one batch"""
+        records = []
+        uncategorized = []
+        error_count = 0
+        for row in transactions:
+            try:
+                transaction = TRANSACTION_CREATE_ADAPTER.validate_python({
+                    # Placeholder until the batch prediction below fills it in
+                    "category": TransactionCategory.OTHER_EXPENSE,
+                    **{key: value for key, value in row.items() if value is not None},
+                    "account_id": account_id
+                })
+            except ValidationError:
+                error_count += 1
+                continue
             
-            self.db.commit()
+            # Every record carries the same keys so they share one executemany
+            record = {**transaction.model_dump(), "confidence_score": None}
+            if not row.get("category"):
+                uncategorized.append(record)
+            records.append(record)
+        
+        if uncategorized:
+            predictions = self.categorizer.predict_categories([
+                {
+                    "description": record["description"],
+                    "amount": float(record["amount"]),
+                    "merchant_name": record["merchant_name"]
+                }
+                for record in uncategorized
+            ])
+            for record, prediction in zip(uncategorized, predictions):
+                record["category"] = prediction["category"]
+                record["subcategory"] = prediction["subcategory"]
+                record["confidence_score"] = prediction["confidence"]
+        
+        return records, error_count
 
-    async def _recalculate_account_balance(self, account_id: int):
-        """Recalculate account balance from all transactions"""
-        account = self.db.query(Account).filter(Account.id == account_id).first()
-        
-        if account:
-            # Get all transactions for this account
-            transactions = self.db.query(Transaction).filter(
-                Transaction.account_id == account_id
-            ).all()
-            
-            # Calculate balance
-            balance = Decimal('0.00')
-            for transaction in transactions:
-                if transaction.transaction_type == TransactionType.INCOME:
-                    balance += transaction.amount
-                elif transaction.transaction_type == TransactionType.EXPENSE:
-                    balance -= transaction.amount
-            
-            account.current_balance = balance
-            self.db.commit()
+    async def _update_account_balance(
+        self,
+        account_id: int,
+        transaction_type: TransactionType,
+        amount: Decimal
+    ):
+        """Apply a new transaction to its account balance (caller commits)"""
+        delta = self._balance_delta(transaction_type, amount)
+        if delta:
+            await self._adjust_account_balance(account_id, delta)
+
+    @staticmethod
+    def _balance_delta(transaction_type: TransactionType, amount: Decimal) -> Decimal:
+        """Signed effect of a transaction on its account balance (transfers are neutral)"""
+        if transaction_type in INCOME_TYPES:
+            return amount
+        if transaction_type in EXPENSE_TYPES:
+            return -amount
+        return Decimal('0.00')
 
-    async def _get_monthly_trend(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get monthly transaction trend for the last 6 months"""
+    async def _adjust_account_balance(self, account_id: int, delta: Decimal):
+        """Add delta to an account's balance in place (caller commits)"""
+        # Adjusted by the database; the account row is never loaded
+        await self.db.execute(
+            update(Account).where(Account.id == account_id).values(
+                current_balance=Account.current_balance + delta
+            ).execution_options(synchronize_session=False)
+        )
+
+    def _monthly_trend_query(self, user_id: int):
+        """Build the monthly income/expense aggregate query for the last 6 months"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=180)  # 6 months
         
-        # Query monthly aggregates
-        monthly_data = self.db.query(
-            func.date_format(Transaction.transaction_date, '%Y-%m').label('month'),
-            func.sum(
-                func.case(
-                    (Transaction.transaction_type == TransactionType.INCOME, Transaction.amount),
-                    else_=0
-                )
-            ).label('income'),
-            func.sum(
-                func.case(
-                    (Transaction.transaction_type == TransactionType.EXPENSE, Transaction.amount),
-                    else_=0
-                )
-            ).label('expenses')
-        ).join(Account).filter(
+        return select(
+            literal('month').label('kind'),
+            TRANSACTION_MONTH.label('label'),
+            INCOME_TOTAL.label('income'),
+            EXPENSE_TOTAL.label('expenses'),
+            NET_TOTAL.label('net'),
+            null().label('count')
+        ).select_from(Transaction).join(Account).where(
             and_(
                 Account.user_id == user_id,
                 Transaction.transaction_date >= start_date,
                 Transaction.transaction_date <= end_date
             )
-        ).group_by(
-            func.date_format(Transaction.transaction_date, '%Y-%m')
-        ).order_by(
-            func.date_format(Transaction.transaction_date, '%Y-%m')
-        ).all()
-        
-        return [
-            {
-                "month": row.month,
-                "income": float(row.income or 0),
-                "expenses": float(row.expenses or 0),
-                "net": float((row.income or 0) - (row.expenses or 0))
-            }
-            for row in monthly_data
-        ]
\ No newline at end of file
+        ).group_by(TRANSACTION_MONTH)
+
+    @staticmethod
+    def _monthly_trend_entry(row) -> Dict[str, Any]:
+        """Convert a monthly aggregate row to its summary entry"""
+        return {
+            "month": row.label,
+            "income": float(row.income or 0),
+            "expenses": float(row.expenses or 0),
+            "net": float(row.net or 0)
+        }
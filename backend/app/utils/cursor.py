@@ -0,0 +1,22 @@
+"""
+Opaque keyset pagination cursors
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+import orjson
+
+def encode_cursor(position: datetime, row_id: int) -> str:
+    """Encode a (sort key, id) keyset position as a URL-safe token"""
+    raw = orjson.dumps([position.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a token produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position, row_id = orjson.loads(raw)
+        return datetime.fromisoformat(position), int(row_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
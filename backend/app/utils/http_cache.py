@@ -0,0 +1,36 @@
+"""
+HTTP conditional request helpers (ETag / If-None-Match)
+"""
+
+import hashlib
+from typing import Any
+import orjson
+from fastapi import Request, Response, status
+
+# Per-user data: clients may keep a copy but must revalidate before reuse
+CACHE_CONTROL = "private, no-cache"
+
+def weak_etag(*parts: Any) -> str:
+    """Build a weak ETag from values that change whenever the response does"""
+    digest = hashlib.blake2b(orjson.dumps(parts, default=str), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+def set_cache_headers(response: Response, etag: str):
+    """Attach the validator and revalidation policy to a response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
@@ -0,0 +1,96 @@
+"""
+Redis Look-aside Cache for per-user read endpoints
+"""
+
+import logging
+import os
+from typing import Any, Optional
+
+import aioredis
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Cached reads are short-lived; writes also invalidate explicitly
+CACHE_TTL_SECONDS = 60
+
+_redis: Optional[aioredis.Redis] = None
+
+def get_redis() -> aioredis.Redis:
+    """Get the shared Redis client (connections are opened lazily by its pool)"""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            password=os.getenv("REDIS_PASSWORD") or None
+        )
+    return _redis
+
+async def close_redis():
+    """Close the shared Redis client"""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+def user_cache_key(user_id: int, name: str) -> str:
+    """Build the cache key for one of a user's cached resources"""
+    return f"user:{user_id}:{name}"
+
+async def cache_get(key: str, field: Optional[str] = None) -> Optional[Any]:
+    """Get a cached JSON value (optionally a hash field); None on miss or Redis failure"""
+    try:
+        if field is None:
+            raw = await get_redis().get(key)
+        else:
+            raw = await get_redis().hget(key, field)
+    except aioredis.RedisError as e:
+        logger.warning("Redis read failed for %s: %s", key, e)
+        return None
+    
+    return orjson.loads(raw) if raw is not None else None
+
+async def cache_set(
+    key: str,
+    value: Any,
+    field: Optional[str] = None,
+    ttl: int = CACHE_TTL_SECONDS
+):
+    """Store a JSON value (optionally as a hash field) with a TTL"""
+    payload = orjson.dumps(value)
+    
+    try:
+        if field is None:
+            await get_redis().setex(key, ttl, payload)
+        else:
+            pipe = get_redis().pipeline()
+            pipe.hset(key, field, payload)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+    except aioredis.RedisError as e:
+        logger.warning("Redis write failed for %s: %s", key, e)
+
+def user_version_key(user_id: int) -> str:
+    """Build the key of a user's data version counter"""
+    return f"user:{user_id}:version"
+
+async def get_user_version(user_id: int) -> Optional[int]:
+    """Current data version of a user (0 if never bumped, None if Redis is unavailable)"""
+    try:
+        raw = await get_redis().get(user_version_key(user_id))
+    except aioredis.RedisError as e:
+        logger.warning("Redis version read failed for user %s: %s", user_id, e)
+        return None
+    
+    return int(raw) if raw is not None else 0
+
+async def invalidate_user_cache(user_id: int, *names: str):
+    """Drop cached resources for a user after a write and bump their data version"""
+    try:
+        pipe = get_redis().pipeline()
+        pipe.delete(*(user_cache_key(user_id, name) for name in names))
+        pipe.incr(user_version_key(user_id))
+        await pipe.execute()
+    except aioredis.RedisError as e:
+        logger.warning("Redis invalidation failed for user %s: %s", user_id, e)
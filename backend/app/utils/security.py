@@ -4,21 +4,71 @@ Security utilities
 
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+import asyncio
+import hashlib
+import hmac
+import time
+import jwt
+from jwt import ExpiredSignatureError, InvalidTokenError
+from jwt.algorithms import HMACAlgorithm
 from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
 
+from app.utils.cache import LRUCache
+
 load_dotenv()
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY")
+# Encoded once so signing/verifying never re-encodes the secret
+SIGNING_KEY = SECRET_KEY.encode() if SECRET_KEY else None
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Hash behind each HMAC JWT algorithm
+HMAC_HASHES = {
+    "HS256": HMACAlgorithm.SHA256,
+    "HS384": HMACAlgorithm.SHA384,
+    "HS512": HMACAlgorithm.SHA512
+}
+
+class KeyedHMACAlgorithm(HMACAlgorithm):
+    """
+    HMAC JWT algorithm holding an HMAC object that has already absorbed the
+    signing key; each signature copies it instead of re-keying from scratch
+    """
+
+    def __init__(self, hash_alg, key: bytes):
+        super().__init__(hash_alg)
+        self._key = key
+        self._template = hmac.new(key, digestmod=hash_alg)
+
+    def sign(self, msg: bytes, key: bytes) -> bytes:
+        if key != self._key:
+            return super().sign(msg, key)
+        
+        mac = self._template.copy()
+        mac.update(msg)
+        return mac.digest()
+
+# PyJWT looks algorithms up in a process-wide registry, so swapping ours in
+# covers every encode/decode (verify goes through sign + compare_digest)
+if SIGNING_KEY and ALGORITHM in HMAC_HASHES:
+    jwt.unregister_algorithm(ALGORITHM)
+    jwt.register_algorithm(ALGORITHM, KeyedHMACAlgorithm(HMAC_HASHES[ALGORITHM], SIGNING_KEY))
+
+# Verified token payloads, keyed by a blake2b digest of the token, so bursts
+# of requests from one session skip the HMAC check. Entries are trusted for at
+# most TOKEN_CACHE_TTL_SECONDS and never past the token's own expiry.
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache = LRUCache(maxsize=10_000)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; built once with an explicit cost so nothing is
+# negotiated per call (hashes at another cost are flagged by needs_update)
+pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS, deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -28,6 +78,14 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on a worker thread so bcrypt doesn't block the event loop"""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on a worker thread so bcrypt doesn't block the event loop"""
+    return await asyncio.to_thread(get_password_hash, password)
+
 def create_access_token(
     data: Dict[str, Any], 
     expires_delta_minutes: Optional[int] = None
@@ -41,7 +99,7 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
     
     return encoded_jwt
 
@@ -51,35 +109,63 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
     
     return encoded_jwt
 
 def verify_token(token: str) -> Dict[str, Any]:
     """Verify and decode JWT token"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
         return payload
-    except JWTError as e:
+    except InvalidTokenError as e:
         raise ValueError(f"Invalid token: {str(e)}")
 
+class TokenExpiredError(ValueError):
+    """Raised when a JWT is well-formed and signed but past its expiry"""
+
+def decode_and_validate(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT's signature and expiry in a single decode.
+    Raises TokenExpiredError if expired, ValueError if otherwise invalid.
+    """
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        payload, valid_until = cached
+        if time.time() < valid_until:
+            return dict(payload)
+    
+    try:
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise TokenExpiredError("Token has expired")
+    except InvalidTokenError as e:
+        raise ValueError(f"Invalid token: {str(e)}")
+    
+    # exp is only checked when present; tokens without one are not accepted
+    if payload.get("exp") is None:
+        raise TokenExpiredError("Token has no expiration")
+    
+    valid_until = min(payload["exp"], time.time() + TOKEN_CACHE_TTL_SECONDS)
+    _token_cache.set(cache_key, (payload, valid_until))
+    
+    return dict(payload)
+
 def is_token_expired(token: str) -> bool:
     """Check if token is expired"""
+    # decode_and_validate already rejects tokens that are expired or lack exp,
+    # and serves repeat checks of one token from its payload cache
     try:
-        payload = verify_token(token)
-        exp = payload.get("exp")
-        if exp is None:
-            return True
-        
-        return datetime.utcnow() > datetime.fromtimestamp(exp)
+        decode_and_validate(token)
+        return False
     except ValueError:
         return True
 
 def extract_user_id_from_token(token: str) -> Optional[int]:
     """Extract user ID from token"""
     try:
-        payload = verify_token(token)
-        user_id = payload.get("sub")
+        user_id = decode_and_validate(token).get("sub")
         return int(user_id) if user_id else None
     except (ValueError, TypeError):
-        return None
\ No newline at end of file
+        return None
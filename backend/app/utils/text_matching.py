@@ -0,0 +1,19 @@
+"""
+Multi-pattern substring matching utilities
+"""
+
+from typing import Any, Iterable, Tuple
+import ahocorasick
+
+def build_automaton(words: Iterable[Tuple[str, Any]]) -> ahocorasick.Automaton:
+    """
+    Compile (keyword, value) pairs into an Aho-Corasick automaton so that
+    every keyword occurring in a text is found in one pass over the text
+    """
+    automaton = ahocorasick.Automaton()
+    
+    for keyword, value in words:
+        automaton.add_word(keyword, value)
+    
+    automaton.make_automaton()
+    return automaton
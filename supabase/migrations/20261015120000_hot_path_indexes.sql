@@ -0,0 +1,12 @@
+-- Composite indexes for the hot transaction/account/budget filter paths
+
+-- Transactions are always scoped by account, then filtered by category and/or date range
+CREATE INDEX idx_account_date ON transactions (account_id, transaction_date);
+CREATE INDEX idx_account_category_date ON transactions (account_id, category, transaction_date);
+CREATE INDEX idx_plaid_transaction_id ON transactions (plaid_transaction_id);
+
+-- Active accounts per user
+CREATE INDEX idx_user_active ON accounts (user_id, is_active);
+
+-- Active budgets per user and period
+CREATE INDEX idx_user_period_active ON budgets (user_id, period, is_active);
@@ -0,0 +1,45 @@
+-- Store hot money columns as BIGINT cents instead of DECIMAL(15, 2)
+-- (widen first so amount * 100 cannot overflow the original precision)
+
+ALTER TABLE transactions MODIFY amount DECIMAL(17, 2) NOT NULL;
+UPDATE transactions SET amount = amount * 100;
+ALTER TABLE transactions MODIFY amount BIGINT NOT NULL;
+
+ALTER TABLE accounts MODIFY current_balance DECIMAL(17, 2) DEFAULT 0.00;
+UPDATE accounts SET current_balance = current_balance * 100;
+ALTER TABLE accounts MODIFY current_balance BIGINT DEFAULT 0;
+
+ALTER TABLE budgets MODIFY amount DECIMAL(17, 2) NOT NULL;
+ALTER TABLE budgets MODIFY current_spent DECIMAL(17, 2) DEFAULT 0.00;
+UPDATE budgets SET amount = amount * 100, current_spent = current_spent * 100;
+ALTER TABLE budgets MODIFY amount BIGINT NOT NULL;
+ALTER TABLE budgets MODIFY current_spent BIGINT DEFAULT 0;
+
+-- Views keep reporting currency units
+CREATE OR REPLACE VIEW user_account_summary AS
+SELECT 
+    u.id as user_id,
+    u.email,
+    u.first_name,
+    u.last_name,
+    COUNT(a.id) as total_accounts,
+    SUM(CASE WHEN a.account_type IN ('checking', 'savings') THEN a.current_balance ELSE 0 END) / 100 as total_cash,
+    SUM(CASE WHEN a.account_type = 'credit_card' THEN a.current_balance ELSE 0 END) / 100 as total_credit_debt,
+    SUM(CASE WHEN a.account_type = 'investment' THEN a.current_balance ELSE 0 END) / 100 as total_investments
+FROM users u
+LEFT JOIN accounts a ON u.id = a.user_id AND a.is_active = TRUE
+WHERE u.is_active = TRUE
+GROUP BY u.id, u.email, u.first_name, u.last_name;
+
+CREATE OR REPLACE VIEW monthly_spending_by_category AS
+SELECT 
+    a.user_id,
+    t.category,
+    DATE_FORMAT(t.transaction_date, '%Y-%m') as month,
+    SUM(t.amount) / 100 as total_amount,
+    COUNT(t.id) as transaction_count,
+    AVG(t.amount) / 100 as avg_amount
+FROM transactions t
+JOIN accounts a ON t.account_id = a.id
+WHERE t.transaction_type = 'expense'
+GROUP BY a.user_id, t.category, DATE_FORMAT(t.transaction_date, '%Y-%m');
@@ -0,0 +1,29 @@
+-- Replace native ENUM columns with short VARCHARs guarded by CHECK constraints
+-- (stored values are unchanged; adding a member no longer rewrites the table)
+
+ALTER TABLE users
+    MODIFY role VARCHAR(7) DEFAULT 'user',
+    ADD CONSTRAINT ck_user_role CHECK (role IN ('user', 'premium', 'admin'));
+
+ALTER TABLE accounts
+    MODIFY account_type VARCHAR(11) NOT NULL,
+    ADD CONSTRAINT ck_account_type CHECK (account_type IN ('checking', 'savings', 'credit_card', 'investment', 'loan'));
+
+ALTER TABLE transactions
+    MODIFY transaction_type VARCHAR(8) NOT NULL,
+    MODIFY category VARCHAR(17) NOT NULL,
+    ADD CONSTRAINT ck_transaction_type CHECK (transaction_type IN ('income', 'expense', 'transfer')),
+    ADD CONSTRAINT ck_transaction_category CHECK (category IN (
+        'salary', 'freelance', 'investment_income', 'other_income',
+        'food_dining', 'shopping', 'transportation', 'entertainment', 'bills_utilities',
+        'healthcare', 'education', 'travel', 'insurance', 'taxes', 'other_expense',
+        'transfer_in', 'transfer_out'
+    ));
+
+ALTER TABLE budgets
+    MODIFY period VARCHAR(9) NOT NULL,
+    ADD CONSTRAINT ck_budget_period CHECK (period IN ('weekly', 'monthly', 'quarterly', 'yearly'));
+
+ALTER TABLE goals
+    MODIFY goal_type VARCHAR(18) NOT NULL,
+    ADD CONSTRAINT ck_goal_type CHECK (goal_type IN ('savings', 'debt_payoff', 'investment', 'emergency_fund', 'vacation', 'house_down_payment', 'other'));
@@ -0,0 +1,2 @@
+-- Chatbot and summary queries filter an account's transactions by type and date window
+CREATE INDEX idx_account_type_date ON transactions (account_id, transaction_type, transaction_date);
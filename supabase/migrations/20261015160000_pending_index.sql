@@ -0,0 +1,2 @@
+-- Listings filtered by pending status, newest first, within an account
+CREATE INDEX idx_account_pending_date ON transactions (account_id, is_pending, transaction_date);
@@ -0,0 +1,9 @@
+-- Stored signed balance effect of each transaction (income +, expense -, transfer 0),
+-- so balances and net totals are a plain SUM with no per-row CASE
+ALTER TABLE transactions
+    ADD COLUMN signed_amount BIGINT AS (
+        CASE WHEN transaction_type IN ('income') THEN amount
+        WHEN transaction_type IN ('expense') THEN -amount
+        ELSE 0 END
+    ) STORED,
+    ADD INDEX idx_account_signed_amount (account_id, signed_amount);